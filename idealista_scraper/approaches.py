@@ -14,15 +14,15 @@ APPROACHES: List[str] = [
     "playwright_cdp",  # Playwright attaching to your Chrome (--remote-debugging-port=9222)
 ]
 
+# frozensets for membership tests (the list above stays ordered for --test-approaches)
+_APPROACH_SET = frozenset(APPROACHES)
+_SELENIUM_LIKE = frozenset({"selenium", "undetected"})
+_PLAYWRIGHT_LIKE = frozenset({"playwright", "playwright_cdp"})
 
-def resolve_approach(override: Optional[str] = None) -> str:
-    """
-    Resolve which approach to use. Precedence: override > SCRAPER_APPROACH > USE_SELENIUM > default.
-    Returns one of APPROACHES.
-    """
-    if override and override.lower() in APPROACHES:
-        return override.lower()
-    if SCRAPER_APPROACH and SCRAPER_APPROACH in APPROACHES:
+
+def _resolve_default() -> str:
+    """Default approach from env (none of its inputs change at runtime)."""
+    if SCRAPER_APPROACH and SCRAPER_APPROACH in _APPROACH_SET:
         return SCRAPER_APPROACH
     if USE_SELENIUM:
         return "selenium"
@@ -31,11 +31,24 @@ def resolve_approach(override: Optional[str] = None) -> str:
     return "playwright"  # default; set SCRAPER_APPROACH=undetected to try best anti-detection
 
 
+_DEFAULT_APPROACH = _resolve_default()
+
+
+def resolve_approach(override: Optional[str] = None) -> str:
+    """
+    Resolve which approach to use. Precedence: override > SCRAPER_APPROACH > USE_SELENIUM > default.
+    Returns one of APPROACHES.
+    """
+    if override and override.lower() in _APPROACH_SET:
+        return override.lower()
+    return _DEFAULT_APPROACH
+
+
 def is_selenium_like(approach: str) -> bool:
     """True if this approach uses a Selenium WebDriver (selenium or undetected)."""
-    return approach in ("selenium", "undetected")
+    return approach in _SELENIUM_LIKE
 
 
 def is_playwright_like(approach: str) -> bool:
     """True if this approach uses Playwright."""
-    return approach in ("playwright", "playwright_cdp")
+    return approach in _PLAYWRIGHT_LIKE
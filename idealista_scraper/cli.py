@@ -8,18 +8,9 @@ import sys
 from pathlib import Path
 
 from idealista_scraper.config import IDEALISTA_BASE_URL, MAX_PAGES, PAUSE_FOR_CAPTCHA
-from idealista_scraper.export import (
-    append_csv_row,
-    export_csv,
-    export_json,
-    get_existing_links_from_csv,
-    validate_schema,
-    write_csv_header,
-)
-from idealista_scraper.approaches import APPROACHES
-from idealista_scraper.fetcher import fetch_html, is_blocked_page
-from idealista_scraper.parsers import looks_like_listing_page
-from idealista_scraper.orchestrator import run
+
+# Heavy modules (orchestrator -> Playwright/Selenium, export -> pydantic) are imported
+# inside the branches that need them so --help / --live-test start fast.
 
 
 def _main() -> None:
@@ -85,28 +76,39 @@ def _main() -> None:
         asyncio.run(_test_approaches(args.base_url))
         return
 
+    from idealista_scraper.export import validate_schema
+    from idealista_scraper.orchestrator import run
+
     path = Path(args.output) if args.output else None
     use_csv_incremental = path is not None and path.suffix.lower() == ".csv"
 
     if use_csv_incremental:
+        from idealista_scraper.export import (
+            IncrementalCSVWriter,
+            get_resume_state_from_csv,
+            write_csv_header,
+        )
+
         # Resolve path so we always write to the same file (cwd-independent)
         path = path.resolve()
         # Resume: skip listings already in the CSV (unless --no-resume)
         if args.no_resume:
             existing_links = set()
+            last_seen_page = 0
             write_csv_header(path)  # start fresh: header only, rows appended as we go
             print("Starting from scratch (--no-resume): output file cleared, writing rows as they are ready.", file=sys.stderr)
         else:
-            existing_links = get_existing_links_from_csv(path)
+            existing_links, last_seen_page = get_resume_state_from_csv(path)
             if existing_links:
                 print(f"Resuming: skipping {len(existing_links)} listings already in {path}", file=sys.stderr)
 
         _records_written = [0]  # use list so closure can mutate
+        writer = IncrementalCSVWriter(path)  # one open handle for the whole run
 
         def on_record(record: dict) -> None:
             r = validate_schema(record) if args.validate else record
             try:
-                append_csv_row(r, path)
+                writer.write(r)
                 _records_written[0] += 1
                 if args.verbose and _records_written[0] <= 3:
                     print(f"  Wrote record {_records_written[0]} to {path.name}", file=sys.stderr)
@@ -114,15 +116,20 @@ def _main() -> None:
                 print(f"Error writing record to CSV: {e}", file=sys.stderr)
                 raise
 
-        data = asyncio.run(
-            run(
-                base_url=args.base_url,
-                max_pages=args.max_pages,
-                fetch_details=args.fetch_details,
-                seen_urls=existing_links,
-                on_record=on_record,
+        try:
+            data = asyncio.run(
+                run(
+                    base_url=args.base_url,
+                    max_pages=args.max_pages,
+                    fetch_details=args.fetch_details,
+                    seen_urls=existing_links,
+                    on_record=on_record,
+                    last_seen_page=last_seen_page,
+                    resume=not args.no_resume,
+                )
             )
-        )
+        finally:
+            writer.close()
 
         print(f"Wrote {len(data)} records to {path}", file=sys.stderr)
         if len(data) == 0 and args.fetch_details:
@@ -139,21 +146,28 @@ def _main() -> None:
             )
         )
         if args.validate:
+            from idealista_scraper.export import validate_many
+
             try:
-                data = [validate_schema(r) for r in data]
+                data = validate_many(data)
             except Exception as e:
                 print(f"Validation error: {e}", file=sys.stderr)
                 sys.exit(1)
         if args.output:
+            from idealista_scraper.export import export_csv, export_json, export_ndjson
+
             path = Path(args.output)
-            if path.suffix.lower() == ".csv":
+            suffix = path.suffix.lower()
+            if suffix == ".csv":
                 export_csv(data, path)
+            elif suffix == ".ndjson":
+                export_ndjson(data, path)
             else:
                 export_json(data, path)
             print(f"Wrote {len(data)} records to {path}", file=sys.stderr)
         else:
-            import json
-            print(json.dumps(data, indent=2, ensure_ascii=False))
+            from idealista_scraper.export import json_dumps_pretty
+            print(json_dumps_pretty(data))
 
 
 # Long 200 response is likely real content; block pages are usually short
@@ -162,28 +176,41 @@ _MIN_HTML_LENGTH_NOT_BLOCKED = 12_000
 
 async def _test_approaches(base_url: str) -> None:
     """Try each scraper approach and report which one(s) get a valid listing page."""
+    from idealista_scraper.approaches import APPROACHES
+    from idealista_scraper.fetcher import fetch_html, is_blocked_page
+    from idealista_scraper.parsers import looks_like_listing_page
+
     url = base_url.rstrip("/") + "/"
     print(f"Testing scraper approaches on {url}", file=sys.stderr)
     if PAUSE_FOR_CAPTCHA:
         print("PAUSE_FOR_CAPTCHA is set: you will be prompted to solve captcha on the first approach.", file=sys.stderr)
     print("", file=sys.stderr)
 
-    results = []
-    for i, approach in enumerate(APPROACHES):
-        pause = PAUSE_FOR_CAPTCHA and (i == 0)
-        try:
-            html, status = await fetch_html(url, approach=approach, pause_for_captcha=pause)
-        except Exception as e:
-            print(f"  {approach}: ERROR – {e}", file=sys.stderr)
-            results.append((approach, False, "error", 0))
-            continue
+    # Approaches are independent, so run them concurrently (wall time = slowest test, not
+    # the sum). Semaphore caps parallel browsers; each launches its own Chrome/Chromium.
+    sem = asyncio.Semaphore(2)
+
+    async def _run_one(approach: str, pause: bool = False) -> tuple:
+        async with sem:
+            try:
+                html, status = await fetch_html(url, approach=approach, pause_for_captcha=pause)
+            except Exception as e:
+                print(f"  {approach}: ERROR – {e}", file=sys.stderr)
+                return (approach, False, "error", 0)
         long_ok = status == 200 and len(html) >= _MIN_HTML_LENGTH_NOT_BLOCKED
         looks_ok = looks_like_listing_page(html)
         blocked = is_blocked_page(html) and not looks_ok
         ok = status == 200 and (long_ok or not blocked)
-        results.append((approach, ok, status, len(html)))
         status_str = "OK" if ok else "FAIL"
         print(f"  {approach}: {status_str} (status={status}, len={len(html)}, blocked={blocked})", file=sys.stderr)
+        return (approach, ok, status, len(html))
+
+    if PAUSE_FOR_CAPTCHA:
+        # Human-in-the-loop captcha only makes sense serially for the first approach
+        results = [await _run_one(APPROACHES[0], pause=True)]
+        results += list(await asyncio.gather(*(_run_one(a) for a in APPROACHES[1:])))
+    else:
+        results = list(await asyncio.gather(*(_run_one(a) for a in APPROACHES)))
 
     print("", file=sys.stderr)
     passed = [a for a, ok, _, _ in results if ok]
@@ -201,6 +228,9 @@ async def _test_approaches(base_url: str) -> None:
 
 
 async def _live_test(base_url: str) -> None:
+    from idealista_scraper.fetcher import fetch_html, is_blocked_page
+    from idealista_scraper.parsers import looks_like_listing_page
+
     url = base_url.rstrip("/") + "/"
     print(f"Live test: fetching {url} ...", file=sys.stderr)
     html, status = await fetch_html(url, pause_for_captcha=PAUSE_FOR_CAPTCHA)
@@ -0,0 +1,144 @@
+"""URL and content dedup: plain set for normal runs, Bloom filter for very large resumes."""
+import hashlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+try:
+    from pybloom_live import ScalableBloomFilter
+    BLOOM = True
+except ImportError:
+    BLOOM = False
+
+# Above this many estimated rows a resume file switches to the Bloom filter (when installed)
+BLOOM_THRESHOLD_ROWS = 50_000
+
+# Exact LRU window kept alongside the bloom (recent adds are checked exactly, so the
+# current crawl window never suffers a false positive)
+_RECENT_WINDOW = 4096
+
+
+class BloomLinkSet:
+    """
+    Set-like membership over a scalable Bloom filter (~3-4 MB for 200k URLs versus tens
+    of MB for set[str]). Supports `in`, `add`, `len`, and truthiness — the operations the
+    orchestrator and CLI use on seen_urls. Membership can (rarely) report a false
+    positive for old links; links added this run are also tracked in a small exact LRU.
+    """
+
+    def __init__(self, initial_capacity: int = BLOOM_THRESHOLD_ROWS, error_rate: float = 1e-6) -> None:
+        self._bloom = ScalableBloomFilter(initial_capacity=initial_capacity, error_rate=error_rate)
+        self._recent: OrderedDict[str, None] = OrderedDict()
+        self._len = 0
+
+    def add(self, link: str) -> None:
+        if not self._bloom.add(link):  # add() returns True when already present
+            self._len += 1
+        self._recent[link] = None
+        self._recent.move_to_end(link)
+        while len(self._recent) > _RECENT_WINDOW:
+            self._recent.popitem(last=False)
+
+    def __contains__(self, link: str) -> bool:
+        return link in self._recent or link in self._bloom
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __bool__(self) -> bool:
+        return self._len > 0
+
+
+class Deduplicator:
+    """
+    Interns URLs to small integer ids: each distinct URL string is hashed exactly once
+    at registration, and membership sets elsewhere hold 8-byte ints instead of ~100-char
+    strings (cheaper to hash on every lookup, and one copy of each URL instead of one
+    per set).
+    """
+
+    def __init__(self) -> None:
+        self._ids: dict[str, int] = {}
+        self._urls: list[str] = []
+
+    def register(self, url: str) -> tuple[int, bool]:
+        """Return (id, was_new) for url, assigning the next id on first sight."""
+        id_ = self._ids.get(url)
+        if id_ is not None:
+            return id_, False
+        id_ = len(self._urls)
+        self._ids[url] = id_
+        self._urls.append(url)
+        return id_, True
+
+    def url(self, id_: int) -> str:
+        """The URL registered under id_."""
+        return self._urls[id_]
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+
+# Content-digest dedup: the same flat is often republished under a new listing ID
+# (agency cross-posts). Digest the stable card fields and skip the detail fetch when
+# we've already scraped identical content.
+CONTENT_BLOOM_PATH = Path.home() / ".cache" / "idealista_scraper" / "content_bloom.bin"
+_CONTENT_CAPACITY = 200_000
+
+
+def content_digest(description: str | None, price: int | None, location: str | None) -> bytes:
+    """16-byte digest of the stable card fields (description, price, location)."""
+    normalized = "|".join((
+        (description or "").lower(),
+        str(price) if price is not None else "",
+        (location or "").lower(),
+    ))
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest()
+
+
+class ContentSeen:
+    """
+    Tracks content digests across runs. Uses a Bloom filter persisted under ~/.cache
+    when pybloom_live is installed; falls back to an in-process exact set otherwise
+    (digests are 16 bytes, so even the fallback stays small).
+    With use_persisted=False the on-disk state is ignored (fresh-scrape runs must not
+    inherit digests from earlier runs); save() then overwrites it with this run's.
+    """
+
+    def __init__(self, path: Path = CONTENT_BLOOM_PATH, use_persisted: bool = True) -> None:
+        self._path = path
+        self._set: set[bytes] = set()
+        self._bloom: Any = None
+        if BLOOM:
+            from pybloom_live import BloomFilter
+            if use_persisted and path.exists():
+                try:
+                    with open(path, "rb") as f:
+                        self._bloom = BloomFilter.fromfile(f)
+                except Exception:
+                    self._bloom = None
+            if self._bloom is None:
+                self._bloom = BloomFilter(capacity=_CONTENT_CAPACITY, error_rate=1e-5)
+
+    def seen_or_add(self, digest: bytes) -> bool:
+        """True if this digest was seen before (and record it either way)."""
+        if self._bloom is not None:
+            try:
+                return self._bloom.add(digest)  # add() returns True when already present
+            except IndexError:  # filter full; stop deduping rather than erroring
+                return False
+        if digest in self._set:
+            return True
+        self._set.add(digest)
+        return False
+
+    def save(self) -> None:
+        """Persist the bloom for the next run (no-op for the set fallback)."""
+        if self._bloom is None:
+            return
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self._path, "wb") as f:
+                self._bloom.tofile(f)
+        except OSError:
+            pass
@@ -1,18 +1,53 @@
 """Export listings to JSON/CSV with optional schema validation."""
 import csv
+import functools
 import json
+import os
 import re
+import signal
+import sys
+import threading
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable
 
 try:
-    from pydantic import BaseModel, Field
+    from pydantic import BaseModel, Field, TypeAdapter
     PYDANTIC = True
 except ImportError:
     PYDANTIC = False
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+from idealista_scraper.dedup import BLOOM, BLOOM_THRESHOLD_ROWS, BloomLinkSet
+
+
+if orjson is not None:
+
+    def json_dumps_pretty(obj: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+    def _json_dumps_compact(obj: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+else:
+
+    def json_dumps_pretty(obj: Any) -> str:
+        return json.dumps(obj, indent=2, ensure_ascii=False)
+
+    def _json_dumps_compact(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+
 # Canonical column order: key fields first, then detail. Same for new file and append.
-CSV_COLUMNS = [
+# Interned so the per-row dicts share key storage and compare by pointer identity.
+CSV_COLUMNS = [sys.intern(c) for c in (
     "title",
     "link",
     "price_eur",
@@ -33,92 +68,152 @@ CSV_COLUMNS = [
     "detail_updated",
     "detail_features",
     "detail_images",
-]
+    "source_page",
+)]
+
+
+_ensured_parents: set[Path] = set()
+
+
+def _ensure_parent(path: Path) -> None:
+    """mkdir -p the parent once per process (skips the stat/mkdir syscalls on repeats)."""
+    parent = path.parent
+    if parent not in _ensured_parents:
+        parent.mkdir(parents=True, exist_ok=True)
+        _ensured_parents.add(parent)
+
+
+_NL_RE = re.compile(r"[\r\n]+")
 
 
 def _safe_str(v: Any) -> str:
     """One-line string, no newlines (keeps CSV columns aligned)."""
     if v is None:
         return ""
-    s = str(v).strip()
-    return re.sub(r"[\r\n]+", " ", s)
+    s = v if type(v) is str else str(v)
+    s = s.strip()
+    # Skip the regex engine for the common case (no newlines at all)
+    if "\n" in s or "\r" in s:
+        return _NL_RE.sub(" ", s)
+    return s
 
 
-def _flatten_for_csv(record: dict[str, Any]) -> dict[str, Any]:
-    """Build one row with canonical columns. Adds price_eur/price_display, flattens detail."""
-    out: dict[str, str] = {col: "" for col in CSV_COLUMNS}
+def _flatten_for_csv_list(record: dict[str, Any]) -> list[str]:
+    """
+    Build one row as a plain list in CSV_COLUMNS order. Adds price_eur/price_display,
+    flattens detail. The write path hands this straight to csv.writer — no per-row dict.
+    """
+    # Bind hot lookups to locals (LOAD_FAST instead of LOAD_GLOBAL/LOAD_ATTR per call)
+    get = record.get
+    safe_str = _safe_str
+    intern = sys.intern
 
-    # Card fields
-    price = record.get("price")
+    title = safe_str(get("title"))
+    link = safe_str(get("link"))
+    location = safe_str(get("location"))
+    # Low-cardinality values ("€", "venta", agency names) interned so long runs hold one copy
+    seller = intern(safe_str(get("seller")))
+    seller_url = safe_str(get("seller_url"))
+    description = safe_str(get("description"))
+
+    price = get("price")
     if price is not None and not isinstance(price, int):
         try:
             price = int(price)
         except (TypeError, ValueError):
             price = None
-    out["price_eur"] = str(price) if price is not None else ""
-    out["currency"] = _safe_str(record.get("currency") or "€")
+    price_eur = str(price) if price is not None else ""
+    currency = intern(safe_str(get("currency") or "€"))
+    price_display = ""
     if price is not None:
-        out["price_display"] = f"{price:,.0f} {out['currency']}".replace(",", ".")
-    out["title"] = _safe_str(record.get("title"))
-    out["link"] = _safe_str(record.get("link"))
-    out["rooms"] = str(record.get("rooms")) if record.get("rooms") is not None else ""
-    out["sq_meters"] = str(record.get("sq_meters")) if record.get("sq_meters") is not None else ""
-    out["location"] = _safe_str(record.get("location"))
-    detail = record.get("detail")  # used for backfill and detail columns
+        # "_" grouping happens in the C formatter; swapping one char beats formatting as
+        # float with "," then re-scanning the longer string
+        price_display = f"{price:_d} {currency}".replace("_", ".")
+    rooms = get("rooms")
+    rooms_s = str(rooms) if rooms is not None else ""
+    sq_meters = get("sq_meters")
+    sq_meters_s = str(sq_meters) if sq_meters is not None else ""
+
+    detail = get("detail")  # used for backfill and detail columns
+    detail_title = detail_location = detail_price = ""
+    detail_description = detail_updated = detail_features = detail_images = ""
     if isinstance(detail, dict):
-        feats = detail.get("features") or {}
-        if not out["rooms"] and feats.get("rooms"):
+        raw_feats = detail.get("features")
+        feats = raw_feats or {}
+        if not rooms_s and feats.get("rooms"):
             try:
-                out["rooms"] = str(feats["rooms"][0]) if feats["rooms"] else ""
+                rooms_s = str(feats["rooms"][0]) if feats["rooms"] else ""
             except (IndexError, TypeError):
                 pass
-        if not out["sq_meters"] and feats.get("sq_meters"):
+        if not sq_meters_s and feats.get("sq_meters"):
             try:
-                out["sq_meters"] = str(feats["sq_meters"][0]) if feats["sq_meters"] else ""
+                sq_meters_s = str(feats["sq_meters"][0]) if feats["sq_meters"] else ""
             except (IndexError, TypeError):
                 pass
-        if not out["location"] and detail.get("location"):
-            out["location"] = _safe_str(detail["location"])
-    tags = record.get("tags")
-    out["tags"] = "; ".join(str(t) for t in tags) if isinstance(tags, list) else _safe_str(tags)
-    out["seller"] = _safe_str(record.get("seller"))
-    out["seller_url"] = _safe_str(record.get("seller_url"))
-    out["description"] = _safe_str(record.get("description"))
-    out["listing_type"] = _safe_str(record.get("listing_type") or "venta")
-
-    # Detail fields (detail already fetched above for backfill)
-    if isinstance(detail, dict):
-        out["detail_title"] = _safe_str(detail.get("title"))
-        out["detail_location"] = _safe_str(detail.get("location"))
+        if not location and detail.get("location"):
+            location = safe_str(detail["location"])
+        detail_title = safe_str(detail.get("title"))
+        detail_location = safe_str(detail.get("location"))
         dp = detail.get("price")
-        out["detail_price"] = str(dp) if dp is not None else ""
-        out["detail_description"] = _safe_str(detail.get("description"))
-        out["detail_updated"] = _safe_str(detail.get("updated"))
-        if isinstance(detail.get("features"), dict):
-            out["detail_features"] = json.dumps(detail["features"], ensure_ascii=False)
+        detail_price = str(dp) if dp is not None else ""
+        detail_description = safe_str(detail.get("description"))
+        detail_updated = safe_str(detail.get("updated"))
+        if isinstance(raw_feats, dict):
+            detail_features = _json_dumps_compact(raw_feats)
         if isinstance(detail.get("images"), list):
-            out["detail_images"] = "; ".join(str(u) for u in detail["images"])
-    return out
+            detail_images = "; ".join(str(u) for u in detail["images"])
+    tags = get("tags")
+    tags_s = "; ".join(str(t) for t in tags) if isinstance(tags, list) else safe_str(tags)
+    listing_type = intern(safe_str(get("listing_type") or "venta"))
+    source_page = get("_source_page")
+    source_page_s = str(source_page) if source_page is not None else ""
+
+    return [
+        title, link, price_eur, price_display, currency, rooms_s, sq_meters_s, location,
+        tags_s, seller, seller_url, description, listing_type, detail_title,
+        detail_location, detail_price, detail_description, detail_updated,
+        detail_features, detail_images, source_page_s,
+    ]
+
+
+def _flatten_for_csv(record: dict[str, Any]) -> dict[str, Any]:
+    """Dict view of _flatten_for_csv_list (kept for callers that want named columns)."""
+    return dict(zip(CSV_COLUMNS, _flatten_for_csv_list(record)))
+
+
+def export_json(data: Iterable[dict[str, Any]], path: str | Path) -> None:
+    """Write records as a JSON array, serializing one record at a time (O(1 record) memory)."""
+    path = Path(path)
+    _ensure_parent(path)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        first = True
+        for rec in data:
+            f.write("\n" if first else ",\n")
+            f.write(json_dumps_pretty(rec))
+            first = False
+        f.write("\n]" if not first else "]")
 
 
-def export_json(data: list[dict[str, Any]], path: str | Path) -> None:
+def export_ndjson(data: Iterable[dict[str, Any]], path: str | Path) -> None:
+    """Write one JSON object per line (NDJSON): streams and appends trivially."""
     path = Path(path)
-    path.parent.mkdir(parents=True, exist_ok=True)
+    _ensure_parent(path)
     with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+        for rec in data:
+            f.write(_json_dumps_compact(rec))
+            f.write("\n")
 
 
 def export_csv(data: list[dict[str, Any]], path: str | Path) -> None:
     path = Path(path)
-    path.parent.mkdir(parents=True, exist_ok=True)
+    _ensure_parent(path)
     if not data:
         return
-    flat = [_flatten_for_csv(d) for d in data]
+    flat = [_flatten_for_csv_list(d) for d in data]
     with open(path, "w", encoding="utf-8", newline="") as f:
-        w = csv.DictWriter(
-            f, fieldnames=CSV_COLUMNS, extrasaction="ignore", quoting=csv.QUOTE_NONNUMERIC
-        )
-        w.writeheader()
+        w = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        w.writerow(CSV_COLUMNS)
         w.writerows(flat)
 
 
@@ -126,35 +221,97 @@ def export_csv(data: list[dict[str, Any]], path: str | Path) -> None:
 CANONICAL_LISTING_URL = "https://www.idealista.com/inmueble/"
 
 
+_INMUEBLE_SEGMENT = "/inmueble/"
+
+
+@functools.lru_cache(maxsize=131072)
 def normalize_listing_link(url: str) -> str:
     """Return canonical form https://www.idealista.com/inmueble/{id}/ so ca/en/fr variants dedupe to one."""
-    if not url or "idealista" not in url.lower() or "/inmueble/" not in url:
+    if not url or "idealista" not in url.lower() or _INMUEBLE_SEGMENT not in url:
         return url.strip()
-    m = re.search(r"/inmueble/(\d+)/?", url)
-    if m:
-        return f"{CANONICAL_LISTING_URL}{m.group(1)}/"
+    # The URL format is rigid, so slice the digits out directly (much faster than a regex
+    # when called once per link on resume and during dedupe)
+    i = url.find(_INMUEBLE_SEGMENT) + len(_INMUEBLE_SEGMENT)
+    j = i
+    n = len(url)
+    while j < n and url[j].isdigit():
+        j += 1
+    if j > i:
+        return f"{CANONICAL_LISTING_URL}{url[i:j]}/"
     return url.strip()
 
 
-def get_existing_links_from_csv(path: str | Path) -> set[str]:
-    """Read an existing CSV and return the set of canonical listing links (for resume). Dedupes by listing ID."""
+def get_resume_state_from_csv(path: str | Path) -> "tuple[set[str] | BloomLinkSet, int]":
+    """
+    Read an existing CSV and return (canonical listing links, last search page seen).
+    The links dedupe by listing ID; the page number is the max of the source_page column
+    (0 for files written before that column existed), letting resume jump straight to the
+    next page instead of estimating from row count. Very large files get a Bloom filter
+    instead of a set (when pybloom_live is installed) — same `in`/`add`/`len` interface,
+    a fraction of the memory.
+    """
     path = Path(path)
     if not path.exists():
-        return set()
-    links: set[str] = set()
+        return set(), 0
+    links: "set[str] | BloomLinkSet" = set()
+    last_page = 0
+    size = path.stat().st_size
+    if BLOOM and size // 200 > BLOOM_THRESHOLD_ROWS:  # ~200 bytes/row estimate
+        links = BloomLinkSet()
+    if pd is not None and size > 1_000_000:
+        # Big resume file: let pandas' C parser read just the columns we need
+        frame = None
+        try:
+            frame = pd.read_csv(path, usecols=["link", "source_page"], dtype=str, na_filter=False, engine="c")
+        except ValueError:
+            # Older file without source_page (or malformed header): links only
+            try:
+                frame = pd.read_csv(path, usecols=["link"], dtype=str, na_filter=False, engine="c")
+            except ValueError:
+                pass  # ragged/odd file: the python reader below copes row by row
+        if frame is not None:
+            for link in frame["link"]:
+                link = link.strip()
+                if link:
+                    links.add(normalize_listing_link(link) if _INMUEBLE_SEGMENT in link else link)
+            if "source_page" in frame.columns:
+                pages = pd.to_numeric(frame["source_page"], errors="coerce")
+                if pages.notna().any():
+                    last_page = int(pages.max())
+            return links, last_page
     with open(path, encoding="utf-8", newline="") as f:
-        reader = csv.DictReader(f)
+        # csv.reader + column indexes: no per-row dict construction (we only need two fields)
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header or "link" not in header:
+            return links, 0
+        idx = header.index("link")
+        page_idx = header.index("source_page") if "source_page" in header else -1
         for row in reader:
-            link = row.get("link", "").strip()
+            if idx >= len(row):
+                continue
+            link = row[idx].strip()
             if link:
-                links.add(normalize_listing_link(link))
-    return links
+                # Only canonicalize listing URLs; anything else goes in as-is
+                links.add(normalize_listing_link(link) if _INMUEBLE_SEGMENT in link else link)
+            if 0 <= page_idx < len(row):
+                raw_page = row[page_idx].strip()
+                if raw_page.isdigit():
+                    page = int(raw_page)
+                    if page > last_page:
+                        last_page = page
+    return links, last_page
+
+
+def get_existing_links_from_csv(path: str | Path) -> "set[str] | BloomLinkSet":
+    """The links half of get_resume_state_from_csv (kept for callers that only dedupe)."""
+    return get_resume_state_from_csv(path)[0]
 
 
 def write_csv_header(path: str | Path) -> None:
     """Write only the CSV header row (for starting a fresh file before appending rows)."""
     path = Path(path)
-    path.parent.mkdir(parents=True, exist_ok=True)
+    _ensure_parent(path)
     with open(path, "w", encoding="utf-8", newline="") as f:
         w = csv.DictWriter(
             f, fieldnames=CSV_COLUMNS, extrasaction="ignore", quoting=csv.QUOTE_NONNUMERIC
@@ -163,21 +320,178 @@ def write_csv_header(path: str | Path) -> None:
         f.flush()
 
 
-def append_csv_row(record: dict[str, Any], path: str | Path) -> None:
-    """Append a single flattened record to a CSV (creates file with header if new)."""
-    path = Path(path)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    flat = _flatten_for_csv(record)
-    row = {k: flat.get(k, "") for k in CSV_COLUMNS}
-    write_header = not path.exists() or path.stat().st_size == 0
-    with open(path, "a", encoding="utf-8", newline="") as f:
-        w = csv.DictWriter(
-            f, fieldnames=CSV_COLUMNS, extrasaction="ignore", quoting=csv.QUOTE_NONNUMERIC
-        )
-        if write_header:
-            w.writeheader()
-        w.writerow(row)
-        f.flush()
+# Rows buffered before one writerows() call (amortizes the csv module's per-row dispatch)
+CSV_WRITE_BATCH = 64
+
+# CSV_FAST=1: hand-rolled row formatting instead of the csv module's per-field dispatch.
+# Valid because every flattened value is a string (QUOTE_NONNUMERIC quotes them all) and
+# _safe_str guarantees no embedded newlines; output is byte-identical to the csv module.
+_CSV_FAST = os.environ.get("CSV_FAST", "").strip().lower() in ("1", "true", "yes")
+
+
+def _format_rows_fast(rows: list[list[str]]) -> str:
+    """Join flattened rows into one CSV chunk: quote every field, escape embedded quotes."""
+    lines = []
+    for row in rows:
+        lines.append(",".join('"' + v.replace('"', '""') + '"' for v in row))
+    lines.append("")  # trailing \r\n
+    return "\r\n".join(lines)
+
+
+class IncrementalCSVWriter:
+    """
+    Append records to a CSV over one persistent file handle (header written if new file).
+    Replaces per-row open/stat/close with a single open for the whole run. Rows are
+    buffered and written in batches of CSV_WRITE_BATCH via writerows(); a background
+    autoflush timer (and SIGINT) flushes the remainder so a crash loses at most a few rows.
+    """
+
+    def __init__(self, path: str | Path, autoflush_seconds: float = 5.0) -> None:
+        self.path = Path(path)
+        _ensure_parent(self.path)
+        # Appended rows must match the header already in the file: a file written
+        # before a column was added would otherwise grow rows wider than its header,
+        # which breaks strict CSV parsers (pandas) and hides the new column on resume.
+        self._columns = CSV_COLUMNS
+        existing_header = self._read_existing_header()
+        if existing_header is not None and existing_header != CSV_COLUMNS:
+            if set(existing_header) <= set(CSV_COLUMNS):
+                self._migrate_legacy_file(existing_header)  # rewrite into CSV_COLUMNS
+            else:
+                self._columns = existing_header  # unknown columns: shape rows to the file
+        self._file = open(self.path, "a", encoding="utf-8", newline="")
+        # Positional csv.writer: rows come from _flatten_for_csv_list already in column order
+        self._writer = csv.writer(self._file, quoting=csv.QUOTE_NONNUMERIC)
+        if existing_header is None:
+            self._writer.writerow(self._columns)
+        self._buf: list[list[str]] = []
+        self._lock = threading.Lock()
+        self._autoflush_seconds = autoflush_seconds
+        self._timer: threading.Timer | None = None
+        self._schedule_autoflush()
+        # Flush on Ctrl+C so an interrupted run keeps everything scraped so far
+        try:
+            self._prev_sigint = signal.signal(signal.SIGINT, self._on_sigint)
+        except ValueError:  # not in main thread; autoflush timer still covers us
+            self._prev_sigint = None
+
+    def _read_existing_header(self) -> "list[str] | None":
+        """Header row of the existing file, or None when the file is absent/empty."""
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            return None
+        with open(self.path, encoding="utf-8", newline="") as f:
+            return next(csv.reader(f), None)
+
+    def _migrate_legacy_file(self, old_header: list[str]) -> None:
+        """
+        One-time rewrite of a file whose header predates newer CSV_COLUMNS: rows are
+        re-laid-out into the current column order (missing columns become ""), so
+        appends and resume reads see one consistent schema.
+        """
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        positions = [CSV_COLUMNS.index(c) for c in old_header]
+        width = len(CSV_COLUMNS)
+        # A file damaged by an older version may already hold full-width rows under
+        # the short header; keep those as-is when the old header is a prefix
+        old_is_prefix = old_header == CSV_COLUMNS[: len(old_header)]
+        with open(self.path, encoding="utf-8", newline="") as src, \
+                open(tmp, "w", encoding="utf-8", newline="") as dst:
+            reader = csv.reader(src)
+            next(reader, None)  # old header
+            writer = csv.writer(dst, quoting=csv.QUOTE_NONNUMERIC)
+            writer.writerow(CSV_COLUMNS)
+            for row in reader:
+                if old_is_prefix and len(row) == width:
+                    writer.writerow(row)
+                    continue
+                out = [""] * width
+                for pos, val in zip(positions, row):
+                    out[pos] = val
+                writer.writerow(out)
+        os.replace(tmp, self.path)
+
+    def write(self, record: dict[str, Any]) -> None:
+        """Flatten one record and append it; written out once CSV_WRITE_BATCH rows accumulate."""
+        row = _flatten_for_csv_list(record)
+        if self._columns is not CSV_COLUMNS:
+            named = dict(zip(CSV_COLUMNS, row))
+            row = [named.get(c, "") for c in self._columns]
+        with self._lock:
+            self._buf.append(row)
+            if len(self._buf) >= CSV_WRITE_BATCH:
+                self._write_buf()
+
+    def flush(self) -> None:
+        """Write buffered rows and push them to disk (fsync) for durability."""
+        with self._lock:
+            if self._file.closed:
+                return
+            if self._buf:
+                self._write_buf()
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def _write_buf(self) -> None:
+        """Emit buffered rows (caller holds the lock)."""
+        if _CSV_FAST:
+            self._file.write(_format_rows_fast(self._buf))
+        else:
+            self._writer.writerows(self._buf)
+        self._buf.clear()
+
+    def close(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._prev_sigint is not None:
+            try:
+                signal.signal(signal.SIGINT, self._prev_sigint)
+            except ValueError:
+                pass
+            self._prev_sigint = None
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def _schedule_autoflush(self) -> None:
+        self._timer = threading.Timer(self._autoflush_seconds, self._autoflush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _autoflush(self) -> None:
+        try:
+            self.flush()
+        except ValueError:  # file closed between checks
+            return
+        self._schedule_autoflush()
+
+    def _on_sigint(self, signum: Any, frame: Any) -> None:
+        # Never block here: on the inline on_record path write() runs on this same
+        # thread, so a Ctrl+C landing while it holds the lock would deadlock a
+        # blocking flush(). Best effort under a try-acquire instead — the autoflush
+        # timer already bounds what an unflushed buffer can lose to a few rows.
+        try:
+            if self._lock.acquire(blocking=False):
+                try:
+                    if not self._file.closed:
+                        if self._buf:
+                            self._write_buf()
+                        self._file.flush()
+                        os.fsync(self._file.fileno())
+                finally:
+                    self._lock.release()
+        finally:
+            prev = self._prev_sigint
+            if callable(prev):
+                prev(signum, frame)
+            else:
+                raise KeyboardInterrupt
+
+    def __enter__(self) -> "IncrementalCSVWriter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
 
 
 if PYDANTIC:
@@ -196,11 +510,21 @@ if PYDANTIC:
         seller: str | None = None
         seller_url: str | None = None
 
+    # One core-schema dispatch for whole batches (notably faster than per-record validate)
+    _LIST_ADAPTER = TypeAdapter(list[ListingCardSchema])
+
     def validate_schema(record: dict[str, Any]) -> dict[str, Any]:
         """Validate and coerce one record; raise if invalid."""
         return ListingCardSchema.model_validate(record).model_dump()
 
+    def validate_many(records: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Validate and coerce a batch of records in one adapter call; raise if any invalid."""
+        return [m.model_dump() for m in _LIST_ADAPTER.validate_python(records)]
+
 else:
 
     def validate_schema(record: dict[str, Any]) -> dict[str, Any]:
         return record
+
+    def validate_many(records: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        return records
@@ -1,18 +1,120 @@
 """Fetch HTML from Idealista: Playwright or Selenium (stealth + delays + scroll)."""
 import asyncio
+import contextvars
+import functools
+import os
 import random
+import re
+import sys
+import threading
 import time
-from typing import Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+from urllib.parse import urlparse
 
 from idealista_scraper.config import (
     CHROME_CDP_URL,
     DELAY_MAX,
     DELAY_MIN,
+    DETAIL_CONCURRENCY,
     HEADLESS,
     PROXY_URL,
+    SCRAPER_APPROACH,
     USE_SELENIUM,
 )
 from idealista_scraper.approaches import is_selenium_like, resolve_approach
+from idealista_scraper.parsers import looks_like_listing_page
+
+# Hot-path browser imports hoisted to module level (None when the optional package is
+# absent; the code paths that use them only run when it is installed). Heavy one-shot
+# imports (playwright.async_api, undetected_chromedriver, httpx) stay lazy — they run
+# once per process, not per fetch.
+try:
+    from selenium import webdriver as _webdriver
+    from selenium.webdriver.chrome.options import Options as _ChromeOptions
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+except ImportError:
+    _webdriver = _ChromeOptions = By = EC = WebDriverWait = None
+
+try:
+    from playwright_stealth import stealth_async
+except ImportError:
+    stealth_async = None
+
+
+# Shared HTTP client: one connection pool (and one TLS handshake per host) for all raw-HTTP
+# fetches in a process. Browser approaches manage their own connections, so this only backs
+# plain httpx requests (e.g. endpoints that don't need JS).
+_HTTP_CLIENT = None
+
+
+def get_http_client():
+    """Return the process-wide httpx.AsyncClient, creating it on first use."""
+    global _HTTP_CLIENT
+    import httpx
+
+    if _HTTP_CLIENT is None or _HTTP_CLIENT.is_closed:
+        _HTTP_CLIENT = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=4, keepalive_expiry=30),
+            timeout=httpx.Timeout(60.0),
+            follow_redirects=True,
+            proxy=PROXY_URL,
+            headers=_BROWSER_HEADERS,
+        )
+    return _HTTP_CLIENT
+
+
+# Browser-like headers for the raw-HTTP fast path
+_BROWSER_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
+    "Accept-Language": "es-ES,es;q=0.9,en;q=0.8",
+}
+
+
+# Retry-After (seconds) from the last raw-HTTP response in this task, so the retry loop
+# can honor the server's own wait instead of guessing (browser paths leave it unset)
+_LAST_RETRY_AFTER: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "retry_after", default=None
+)
+
+# URL whose rate-limit interval was already served by the raw-HTTP fast path in this
+# task. When that fetch escalates to a browser, the browser path consumes this instead
+# of reserving (and sleeping) a second full human delay for the same logical fetch.
+_RATE_PREPAID: contextvars.ContextVar[str] = contextvars.ContextVar("rate_prepaid", default="")
+
+
+async def _fetch_html_httpx(url: str) -> tuple[str, int]:
+    """
+    Raw HTTP GET over the shared client: no browser process, no JS engine. Returns
+    ("", 0) on transport errors so the caller can escalate to a browser.
+    """
+    _LAST_RETRY_AFTER.set(None)
+    try:
+        resp = await get_http_client().get(url)
+    except Exception:
+        return ("", 0)
+    raw = resp.headers.get("retry-after")
+    if raw is not None:
+        try:
+            _LAST_RETRY_AFTER.set(min(float(raw), 300.0))
+        except ValueError:  # HTTP-date form; not worth parsing here
+            pass
+    return (resp.text, resp.status_code)
+
+
+async def aclose_http_client() -> None:
+    """Close the shared client (end of run); safe to call when it was never created."""
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is not None and not _HTTP_CLIENT.is_closed:
+        await _HTTP_CLIENT.aclose()
+    _HTTP_CLIENT = None
 
 
 def _random_delay(min_sec: float = None, max_sec: float = None) -> float:
@@ -21,32 +123,161 @@ def _random_delay(min_sec: float = None, max_sec: float = None) -> float:
     return random.uniform(min_sec, max_sec)
 
 
+# CHROME_CDP_URL never changes after import, so parse the debugger address once instead
+# of re-running urlparse on every Selenium fetch
+if CHROME_CDP_URL:
+    _parsed_cdp = urlparse(CHROME_CDP_URL)
+    _CDP_ADDR = f"{_parsed_cdp.hostname or '127.0.0.1'}:{_parsed_cdp.port or 9222}"
+else:
+    _CDP_ADDR = None
+
+
+def _is_idealista(url: str) -> bool:
+    return "idealista" in url
+
+
+# When at least this many listing links are already in the DOM, skip the human-like
+# scroll loop (the page is fully server-rendered; Idealista lists 30 cards per page)
+MIN_CARDS_NO_SCROLL = 25
+
+# Matches undetected_chromedriver's version-mismatch error message
+_BROWSER_VER_RE = re.compile(r"Current browser version is (\d+)", re.I)
+
+
+# One long-lived worker thread per reused Selenium driver. asyncio.to_thread picks an
+# arbitrary pool thread each call, which forces chromedriver to re-establish its HTTP
+# session and is why driver access needed a lock; pinning every command for a driver to
+# the same thread keeps the connection warm and serializes access structurally.
+_SELENIUM_EXECUTORS: dict[int, ThreadPoolExecutor] = {}
+_SELENIUM_EXEC_LOCK = threading.Lock()
+
+
+def _selenium_executor(driver: Any) -> ThreadPoolExecutor:
+    """Single-thread executor dedicated to this driver (created on first use)."""
+    key = id(driver)
+    with _SELENIUM_EXEC_LOCK:
+        ex = _SELENIUM_EXECUTORS.get(key)
+        if ex is None:
+            ex = _SELENIUM_EXECUTORS[key] = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="selenium"
+            )
+        return ex
+
+
+def _retire_selenium_executor(driver: Any) -> None:
+    """
+    Drop the executor dedicated to driver. Must be called whenever a reused driver is
+    replaced (restart-after-block) or quit for good — the registry is keyed by id(), so
+    without this every retired driver leaks its worker thread and dict entry forever.
+    In-flight commands on the old driver still finish; the thread exits after them.
+    """
+    with _SELENIUM_EXEC_LOCK:
+        ex = _SELENIUM_EXECUTORS.pop(id(driver), None)
+    if ex is not None:
+        ex.shutdown(wait=False)
+
+
+async def _response_html(page: Any, resp: Any, status: int) -> str:
+    """
+    HTML for a fetched page. Prefers the raw navigation response body (the original
+    server HTML, no DOM re-serialization); falls back to page.content() when the
+    response is unavailable or the body can't be read/decoded.
+    """
+    if resp is not None and status == 200:
+        try:
+            body = await resp.body()
+            ctype = resp.headers.get("content-type", "")
+            charset = ctype.rsplit("charset=", 1)[-1].split(";")[0].strip() if "charset=" in ctype else "utf-8"
+            html = body.decode(charset, errors="replace")
+            if html:
+                return html
+        except Exception:
+            pass
+    return await page.content()
+
+
+# Max in-flight fetches per event loop (mostly relevant for the raw-HTTP fast path;
+# browser paths are effectively serialized by the shared page/driver anyway)
+FETCH_CONCURRENCY = int(os.environ.get("FETCH_CONCURRENCY", "50"))
+
+_FETCH_SEMS: dict[int, asyncio.Semaphore] = {}
+
+
+def _fetch_sem() -> asyncio.Semaphore:
+    """Semaphore for the current event loop (CLI runs several asyncio.run loops)."""
+    loop_id = id(asyncio.get_running_loop())
+    sem = _FETCH_SEMS.get(loop_id)
+    if sem is None:
+        sem = _FETCH_SEMS[loop_id] = asyncio.Semaphore(FETCH_CONCURRENCY)
+    return sem
+
+
+class DomainRateLimiter:
+    """
+    Per-domain pacing: each host gets the human-like random delay *between* its own
+    requests, instead of an unconditional sleep inside every call. A fetch that follows
+    a long detail-parse pays only the remaining interval (often zero), and fetches to
+    different hosts never wait on each other. Reservation-based, so the async and the
+    Selenium (worker-thread) paths share one schedule.
+    """
+
+    def __init__(self) -> None:
+        self._next_free: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _reserve(self, url: str, min_interval: float) -> float:
+        if _RATE_PREPAID.get() == url:
+            # This fetch's interval was already reserved (and served) before the raw
+            # GET that is now escalating; the host schedule already accounts for it
+            _RATE_PREPAID.set("")
+            return 0.0
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_free.get(host, 0.0))
+            self._next_free[host] = start + min_interval
+            return start - now
+
+    async def wait(self, url: str, min_interval: float) -> None:
+        delay = self._reserve(url, min_interval)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def wait_sync(self, url: str, min_interval: float) -> None:
+        delay = self._reserve(url, min_interval)
+        if delay > 0:
+            time.sleep(delay)
+
+
+_RATE_LIMITER = DomainRateLimiter()
+
+
+# One combined XPath / locator for the accept button (text in Spanish): a single wait
+# instead of up to four sequential 5s waits when the banner never appears
+_ACCEPT_BUTTON_XPATH = (
+    "//button[contains(., 'Aceptar')]"
+    " | //*[@role='button' and contains(., 'Aceptar')]"
+    " | //a[contains(., 'Aceptar')]"
+    " | //button[contains(., 'continuar')]"
+)
+_ACCEPT_BUTTON_CSS = (
+    "button:has-text('Aceptar'), button:has-text('continuar'), "
+    "[role='button']:has-text('Aceptar'), a:has-text('Aceptar y continuar')"
+)
+
+
 def _dismiss_idealista_cookie_banner_selenium(driver: Any) -> None:
     """If Idealista cookie banner is visible, click 'Aceptar y continuar'. No-op if not found."""
     if not driver or "idealista" not in (driver.current_url or ""):
         return
     try:
-        from selenium.webdriver.common.by import By
-        from selenium.webdriver.support import expected_conditions as EC
-        from selenium.webdriver.support.ui import WebDriverWait
-        time.sleep(2)  # let banner render
-        wait = WebDriverWait(driver, 5)
-        # Try common selectors for the accept button (text in Spanish)
-        selectors = [
-            "//button[contains(., 'Aceptar')]",
-            "//*[@role='button' and contains(., 'Aceptar')]",
-            "//a[contains(., 'Aceptar')]",
-            "//button[contains(., 'continuar')]",
-        ]
-        for xpath in selectors:
-            try:
-                btn = wait.until(EC.element_to_be_clickable((By.XPATH, xpath)))
-                if btn and btn.is_displayed():
-                    btn.click()
-                    time.sleep(1)
-                    return
-            except Exception:
-                continue
+        # No render sleep: the WebDriverWait below already polls until the banner shows
+        btn = WebDriverWait(driver, 3).until(
+            EC.element_to_be_clickable((By.XPATH, _ACCEPT_BUTTON_XPATH))
+        )
+        if btn and btn.is_displayed():
+            btn.click()
+            time.sleep(1)
     except Exception:
         pass
 
@@ -56,24 +287,12 @@ async def _dismiss_idealista_cookie_banner_playwright(page: Any, url: str = "")
     try:
         if "idealista" not in url and "idealista" not in (page.url if hasattr(page, "url") else ""):
             return
-        await asyncio.sleep(2)  # let banner render
-        selectors = [
-            "button:has-text('Aceptar')",
-            "button:has-text('continuar')",
-            "[role='button']:has-text('Aceptar')",
-            "a:has-text('Aceptar y continuar')",
-        ]
-        for sel in selectors:
-            try:
-                loc = page.locator(sel)
-                if await loc.count() > 0:
-                    first = loc.first
-                    if await first.is_visible():
-                        await first.click()
-                        await asyncio.sleep(1)
-                        return
-            except Exception:
-                continue
+        # Event-driven: returns as soon as the banner is visible (usually in the initial
+        # HTML) instead of an unconditional 2s render sleep
+        first = page.locator(_ACCEPT_BUTTON_CSS).first
+        await first.wait_for(state="visible", timeout=2000)
+        await first.click()
+        await asyncio.sleep(1)
     except Exception:
         pass
 
@@ -86,16 +305,215 @@ _VIEWPORTS = (
     {"width": 1366, "height": 768},
 )
 
+_UA = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
+)
+
+# Context options that never vary within a process; call sites add the per-page viewport
+_BASE_CTX_OPTS: dict = {"user_agent": _UA}
+if PROXY_URL:
+    _BASE_CTX_OPTS["proxy"] = {"server": PROXY_URL}
+
+
+class _PoolEntry:
+    __slots__ = ("context", "page", "uses")
+
+    def __init__(self, context: Any, page: Any) -> None:
+        self.context = context
+        self.page = page
+        self.uses = 0
+
+
+# One Playwright driver (node subprocess) per event loop, started lazily and shared by
+# the page pool, CDP connects, and one-off launches. Starting/stopping the driver per
+# fetch costs 100-300 ms; here it persists for the life of the loop.
+_PW_INSTANCES: dict[int, Any] = {}
+
+
+async def _get_playwright() -> Any:
+    """Shared Playwright driver for the current event loop, started on first use."""
+    loop_id = id(asyncio.get_running_loop())
+    pw = _PW_INSTANCES.get(loop_id)
+    if pw is None:
+        from playwright.async_api import async_playwright
+
+        pw = _PW_INSTANCES[loop_id] = await async_playwright().start()
+    return pw
+
+
+async def stop_playwright() -> None:
+    """Stop the current loop's Playwright driver (end of run); safe if never started."""
+    pw = _PW_INSTANCES.pop(id(asyncio.get_running_loop()), None)
+    if pw is not None:
+        try:
+            await pw.stop()
+        except Exception:
+            pass
+
+
+# Last CDP endpoint that accepted a connection, remembered across runs so the next
+# invocation can reattach to a still-running Chrome instead of paying a cold launch
+_BROWSER_STATE_PATH = Path.home() / ".cache" / "idealista_scraper" / "browser.json"
+
+
+def _load_saved_cdp() -> Optional[str]:
+    import json
+    try:
+        return json.loads(_BROWSER_STATE_PATH.read_text()).get("cdp_url") or None
+    except Exception:
+        return None
+
+
+def _save_cdp(url: str) -> None:
+    import json
+    try:
+        _BROWSER_STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        _BROWSER_STATE_PATH.write_text(json.dumps({"cdp_url": url}))
+    except OSError:
+        pass
+
+
+class BrowserPagePool:
+    """
+    Warm Playwright pages for repeated fetches: one lazily-launched Chromium per process,
+    pages handed out via `async with pool.acquire() as page`. Tries to reattach to a
+    known CDP endpoint (CHROME_CDP_URL or the one saved from the previous run) before
+    launching — unless the acquire declined CDP — so subsequent invocations skip the
+    1-3s browser cold start entirely; pages are retired after max_uses fetches so
+    Chromium memory growth stays bounded. Rebuilds itself if used from a new event loop.
+    """
+
+    def __init__(self, max_idle_pages: int = 2, max_uses: int = 50) -> None:
+        self.max_idle_pages = max_idle_pages
+        self.max_uses = max_uses
+        self._loop_id: Optional[int] = None
+        self._pw: Any = None
+        self._browser: Any = None
+        self._via_cdp = False
+        self._idle: list[_PoolEntry] = []
+
+    async def _ensure_browser(self, allow_cdp: bool = True) -> None:
+        loop_id = id(asyncio.get_running_loop())
+        if self._loop_id != loop_id:
+            # Previous loop is gone (CLI runs separate asyncio.run calls); start fresh
+            self._loop_id = loop_id
+            self._pw = None
+            self._browser = None
+            self._via_cdp = False
+            self._idle = []
+        if self._browser is not None and self._via_cdp and not allow_cdp:
+            # The warm browser is an attached Chrome — possibly the user's own — and this
+            # caller explicitly declined CDP, so it must get one we launched. close() on
+            # an attached browser only disconnects; the user's Chrome is left alone.
+            await self.close()
+            self._loop_id = loop_id
+        if self._browser is None:
+            self._pw = await _get_playwright()
+            if allow_cdp:
+                # Connect-first: an existing Chrome (user-started or left over from a prior
+                # run) costs one websocket handshake instead of a full launch. browser.close()
+                # on an attached browser only disconnects, so it stays warm for the next run.
+                for cdp_url in (CHROME_CDP_URL, _load_saved_cdp()):
+                    if not cdp_url:
+                        continue
+                    try:
+                        browser = await self._pw.chromium.connect_over_cdp(cdp_url)
+                    except Exception:
+                        continue
+                    self._browser = browser
+                    self._via_cdp = True
+                    _save_cdp(cdp_url)
+                    return
+            self._browser = await self._pw.chromium.launch(headless=HEADLESS)
+            self._via_cdp = False
+
+    async def _new_entry(self) -> _PoolEntry:
+        ctx_opts = {**_BASE_CTX_OPTS, "viewport": random.choice(_VIEWPORTS)}
+        context = await self._browser.new_context(**ctx_opts)
+        page = await context.new_page()
+        if stealth_async:
+            await stealth_async(page)
+        return _PoolEntry(context, page)
+
+    def acquire(self, *, allow_cdp: bool = True):
+        """
+        Async context manager yielding a warm page; returns it to the pool on exit.
+        allow_cdp=False guarantees the page belongs to a browser we launched, never
+        to an attached Chrome.
+        """
+        return _PoolAcquire(self, allow_cdp)
+
+    async def close(self) -> None:
+        for entry in self._idle:
+            try:
+                await entry.context.close()
+            except Exception:
+                pass
+        self._idle = []
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+        self._via_cdp = False
+        # The Playwright driver is shared process-wide; stop it via stop_playwright()
+        self._pw = None
+        self._loop_id = None
+
+
+class _PoolAcquire:
+    def __init__(self, pool: BrowserPagePool, allow_cdp: bool = True) -> None:
+        self._pool = pool
+        self._allow_cdp = allow_cdp
+        self._entry: Optional[_PoolEntry] = None
+
+    async def __aenter__(self) -> Any:
+        pool = self._pool
+        await pool._ensure_browser(self._allow_cdp)
+        self._entry = pool._idle.pop() if pool._idle else await pool._new_entry()
+        return self._entry.page
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        entry, pool = self._entry, self._pool
+        if entry is None:
+            return
+        entry.uses += 1
+        retire = entry.uses >= pool.max_uses or entry.page.is_closed()
+        if not retire and len(pool._idle) < pool.max_idle_pages:
+            pool._idle.append(entry)
+        else:
+            try:
+                await entry.context.close()
+            except Exception:
+                pass
+
+
+# Keep enough idle pages for the orchestrator's concurrent detail fetches
+_PAGE_POOL = BrowserPagePool(max_idle_pages=max(2, DETAIL_CONCURRENCY))
+
+
+# Full stepped scroll in one evaluate: the browser runs the animation and pauses
+# itself, instead of 2-4 separate eval round-trips (~5-15 ms each) driven from Python
+_SCROLL_JS = """async ({parts, minMs, maxMs}) => {
+  const sleep = ms => new Promise(r => setTimeout(r, ms));
+  const total = document.body.scrollHeight;
+  const step = Math.max(400, Math.floor(total / parts));
+  let y = 0;
+  while (y < total) {
+    y = Math.min(y + step, total);
+    window.scrollTo({ top: y, behavior: 'smooth' });
+    await sleep(minMs + Math.random() * (maxMs - minMs));
+  }
+}"""
+
 
 async def _human_scroll_playwright(page: Any) -> None:
-    """Scroll down in 2–4 steps with small pauses (human-like)."""
-    total = await page.evaluate("document.body.scrollHeight")
-    step = max(400, total // random.randint(2, 4))
-    pos = 0
-    while pos < total:
-        pos = min(pos + step, total)
-        await page.evaluate(f"window.scrollTo({{ top: {pos}, behavior: 'smooth' }})")
-        await asyncio.sleep(random.uniform(0.3, 0.9))
+    """Scroll down in 2–4 steps with small pauses (human-like); single RPC."""
+    await page.evaluate(
+        _SCROLL_JS, {"parts": 2 + int(random.random() * 3), "minMs": 300, "maxMs": 900}
+    )
 
 
 async def fetch_html_with_page(
@@ -110,38 +528,135 @@ async def fetch_html_with_page(
     Fetch URL using an existing Playwright page. Applies delay then page.goto.
     Does not launch or close the browser. Returns (html, status_code).
     """
-    delay = _random_delay(delay_before or DELAY_MIN, delay_before or DELAY_MAX)
-    await asyncio.sleep(delay)
+    await _RATE_LIMITER.wait(url, _random_delay(delay_before or DELAY_MIN, delay_before or DELAY_MAX))
     resp = await page.goto(url, wait_until="domcontentloaded", timeout=60000)
     status = resp.status if resp else 0
-    if "idealista" in url:
+    if _is_idealista(url):
         await _dismiss_idealista_cookie_banner_playwright(page, url)
     if pause_for_captcha:
-        import sys
         print("Waiting 60 seconds before continuing...", file=sys.stderr, flush=True)
         await asyncio.sleep(60)
     if scroll and status == 200:
-        await asyncio.sleep(random.uniform(2.5, 5.5))
-        await _human_scroll_playwright(page)
-    html = await page.content()
+        # Event-driven wait: continue as soon as listing links are attached instead of
+        # sleeping a fixed 2.5-5.5s; keep a short random pause for human-like jitter
+        try:
+            await page.wait_for_selector("a[href*='/inmueble/']", state="attached", timeout=10000)
+        except Exception:
+            pass
+        await asyncio.sleep(random.uniform(0.2, 0.6))
+        # List pages are usually fully server-rendered: when enough listing links are
+        # already in the DOM, the 2-4s scroll loop adds nothing
+        try:
+            card_count = await page.locator("a[href*='/inmueble/']").count()
+        except Exception:
+            card_count = 0
+        if card_count < MIN_CARDS_NO_SCROLL:
+            await _human_scroll_playwright(page)
+    html = await _response_html(page, resp, status)
     return html, status
 
 
+# Same idea for Selenium: execute_async_script runs the whole animation in the browser
+# and calls back when done (last argument is the WebDriver-provided callback)
+_SCROLL_ASYNC_JS = """
+const [parts, minMs, maxMs, done] = arguments;
+const total = document.body.scrollHeight;
+const step = Math.max(400, Math.floor(total / parts));
+let y = 0;
+const tick = () => {
+  if (y >= total) { done(); return; }
+  y = Math.min(y + step, total);
+  window.scrollTo({ top: y, behavior: 'smooth' });
+  setTimeout(tick, minMs + Math.random() * (maxMs - minMs));
+};
+tick();
+"""
+
+
 def _human_scroll(driver: Any) -> None:
-    """Scroll down in 2–4 steps with small pauses (human-like)."""
+    """Scroll down in 2–4 steps with small pauses (human-like); single RPC."""
     try:
-        total = driver.execute_script("return document.body.scrollHeight")
-        step = max(400, total // random.randint(2, 4))
-        pos = 0
-        while pos < total:
-            pos = min(pos + step, total)
-            driver.execute_script(f"window.scrollTo({{ top: {pos}, behavior: 'smooth' }})")
-            time.sleep(random.uniform(0.3, 0.9))
+        driver.set_script_timeout(15)
+        driver.execute_async_script(_SCROLL_ASYNC_JS, 2 + int(random.random() * 3), 300, 900)
     except Exception:
         driver.execute_script(
             "window.scrollTo({ top: document.body.scrollHeight, behavior: 'smooth' })"
         )
-        time.sleep(random.uniform(1, 2))
+        time.sleep(1 + random.random())
+
+
+def _stealth_options(headless: bool) -> Any:
+    """Chrome options for a fresh stealth-ish driver."""
+    opts = _ChromeOptions()
+    opts.add_argument("--disable-blink-features=AutomationControlled")
+    opts.add_argument("--disable-infobars")
+    opts.add_argument("--no-first-run")
+    if headless:
+        opts.add_argument("--headless=new")
+    opts.add_argument(f"user-agent={_UA}")
+    if PROXY_URL:
+        opts.add_argument(f"--proxy-server={PROXY_URL}")
+    return opts
+
+
+def _create_uc_driver(headless: bool) -> Optional[Any]:
+    """
+    undetected_chromedriver Chrome, retrying with version_main when the error names the
+    installed browser version. Returns None on failure (caller falls back to Selenium).
+    """
+    try:
+        import undetected_chromedriver as uc
+        return uc.Chrome(headless=headless, use_subprocess=True)
+    except ImportError:
+        print("undetected_chromedriver not installed. Run: pip install undetected-chromedriver", file=sys.stderr)
+        return None
+    except Exception as e:
+        err = str(e)
+        err_lower = err.lower()
+        match = _BROWSER_VER_RE.search(err)
+        if match and ("version" in err_lower or "chromedriver" in err_lower):
+            try:
+                return uc.Chrome(headless=headless, use_subprocess=True, version_main=int(match.group(1)))
+            except Exception:
+                print(f"undetected_chromedriver failed: {e}. Falling back to standard Selenium.", file=sys.stderr)
+                return None
+        if "version" in err_lower or "chromedriver" in err_lower:
+            print(f"undetected_chromedriver failed: {e}. Falling back to standard Selenium.", file=sys.stderr)
+        return None
+
+
+def _attach_cdp_driver(headless: bool) -> tuple[Any, bool]:
+    """
+    Attach to the user's Chrome at _CDP_ADDR. Returns (driver, attached); starts a
+    fresh stealth driver instead when Chrome isn't reachable.
+    """
+    opts = _ChromeOptions()
+    opts.add_experimental_option("debuggerAddress", _CDP_ADDR)
+    try:
+        return _webdriver.Chrome(options=opts), True
+    except Exception as e:
+        err = str(e).lower()
+        if "cannot connect" in err or "not reachable" in err or "session not created" in err:
+            print(
+                f"Could not connect to Chrome at {_CDP_ADDR}. Starting a new browser instead.\n"
+                "To use your own Chrome (recommended to avoid blocks):\n"
+                "  1. Close Chrome, then start it with: chrome.exe --remote-debugging-port=9222\n"
+                "  2. Leave that window open and run this again.",
+                file=sys.stderr,
+            )
+            return _webdriver.Chrome(options=_stealth_options(headless)), False
+        raise
+
+
+def _create_driver(approach: str, headless: bool) -> tuple[Any, bool]:
+    """(driver, attached_to_user_chrome) for an own-driver fetch."""
+    if approach == "undetected":
+        driver = _create_uc_driver(headless)
+        if driver is not None:
+            return driver, False
+    if _CDP_ADDR:
+        return _attach_cdp_driver(headless)
+    return _webdriver.Chrome(options=_stealth_options(headless)), False
 
 
 def _fetch_html_selenium_sync(
@@ -152,19 +667,13 @@ def _fetch_html_selenium_sync(
     scroll: bool = True,
     approach: Optional[str] = None,
     pause_for_captcha: bool = False,
-    driver_lock: Optional[Any] = None,
 ) -> tuple[str, int]:
     """
     Sync: use Selenium (or undetected_chromedriver) to load url and return (page_source, 200).
     If driver is None, creates or attaches to Chrome, then quits when own_driver.
-    When driver_lock is provided and driver is not None, holds the lock for the whole fetch
-    (Selenium drivers are not thread-safe; asyncio.to_thread may run each call in a different thread).
+    Reused drivers are only ever called from their dedicated executor thread, so no
+    locking is needed here.
     """
-    import sys
-    from urllib.parse import urlparse
-    from selenium import webdriver
-    from selenium.webdriver.chrome.options import Options
-
     own_driver = driver is None
     attached_to_user_chrome = False
     approach = approach or resolve_approach()
@@ -173,109 +682,37 @@ def _fetch_html_selenium_sync(
     headless = HEADLESS and not pause_for_captcha
 
     if own_driver:
-        if approach == "undetected":
-            try:
-                import re
-                import undetected_chromedriver as uc
-                driver = uc.Chrome(headless=headless, use_subprocess=True)
-            except ImportError:
-                print("undetected_chromedriver not installed. Run: pip install undetected-chromedriver", file=sys.stderr)
-                approach = "selenium"
-            except Exception as e:
-                err = str(e)
-                err_lower = err.lower()
-                # Retry with version_main if error says "Current browser version is X"
-                match = re.search(r"Current browser version is (\d+)", err, re.I)
-                if match and ("version" in err_lower or "chromedriver" in err_lower):
-                    try:
-                        version_main = int(match.group(1))
-                        driver = uc.Chrome(headless=headless, use_subprocess=True, version_main=version_main)
-                    except Exception:
-                        print(f"undetected_chromedriver failed: {e}. Falling back to standard Selenium.", file=sys.stderr)
-                        approach = "selenium"
-                else:
-                    if "version" in err_lower or "chromedriver" in err_lower:
-                        print(f"undetected_chromedriver failed: {e}. Falling back to standard Selenium.", file=sys.stderr)
-                    approach = "selenium"
-
-        if own_driver and driver is None:
-            opts = Options()
-            if CHROME_CDP_URL:
-                parsed = urlparse(CHROME_CDP_URL)
-                addr = f"{parsed.hostname or '127.0.0.1'}:{parsed.port or 9222}"
-                opts.add_experimental_option("debuggerAddress", addr)
-                try:
-                    driver = webdriver.Chrome(options=opts)
-                    attached_to_user_chrome = True
-                except Exception as e:
-                    err = str(e).lower()
-                    if "cannot connect" in err or "not reachable" in err or "session not created" in err:
-                        print(
-                            f"Could not connect to Chrome at {addr}. Starting a new browser instead.\n"
-                            "To use your own Chrome (recommended to avoid blocks):\n"
-                            "  1. Close Chrome, then start it with: chrome.exe --remote-debugging-port=9222\n"
-                            "  2. Leave that window open and run this again.",
-                            file=sys.stderr,
-                        )
-                        opts = Options()
-                        opts.add_argument("--disable-blink-features=AutomationControlled")
-                        opts.add_argument("--disable-infobars")
-                        if headless:
-                            opts.add_argument("--headless=new")
-                        opts.add_argument(
-                            "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                            "(KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
-                        )
-                        if PROXY_URL:
-                            opts.add_argument(f"--proxy-server={PROXY_URL}")
-                        driver = webdriver.Chrome(options=opts)
-                    else:
-                        raise
-            else:
-                opts.add_argument("--disable-blink-features=AutomationControlled")
-                opts.add_argument("--disable-infobars")
-                if headless:
-                    opts.add_argument("--headless=new")
-                opts.add_argument(
-                    "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                    "(KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
-                )
-                if PROXY_URL:
-                    opts.add_argument(f"--proxy-server={PROXY_URL}")
-                driver = webdriver.Chrome(options=opts)
+        driver, attached_to_user_chrome = _create_driver(approach, headless)
 
     def _do_fetch() -> tuple[str, int]:
-        delay = _random_delay(delay_before or DELAY_MIN, delay_before or DELAY_MAX)
-        time.sleep(delay)
+        _RATE_LIMITER.wait_sync(url, _random_delay(delay_before or DELAY_MIN, delay_before or DELAY_MAX))
         driver.get(url)
-        if "idealista" in url:
+        if _is_idealista(url):
             _dismiss_idealista_cookie_banner_selenium(driver)
         if pause_for_captcha:
             time.sleep(6)  # give page time to appear
-            import sys
             print("Waiting 60 seconds before continuing...", file=sys.stderr, flush=True)
             time.sleep(60)
-        else:
-            time.sleep(random.uniform(2.5, 5.5))
+        # One event-driven wait replaces the old fixed sleeps around it (up to ~7.7s of
+        # idle per page); a short random pause keeps the human-like jitter
         try:
-            from selenium.webdriver.common.by import By
-            from selenium.webdriver.support import expected_conditions as EC
-            from selenium.webdriver.support.ui import WebDriverWait
-            WebDriverWait(driver, 15).until(
+            WebDriverWait(driver, 10).until(
                 EC.presence_of_element_located((By.CSS_SELECTOR, "a[href*='/inmueble/']"))
             )
         except Exception:
             pass
-        time.sleep(random.uniform(0.8, 2.2))
+        time.sleep(random.uniform(0.2, 0.6))
         if scroll:
-            _human_scroll(driver)
+            try:
+                card_count = len(driver.find_elements(By.CSS_SELECTOR, "a[href*='/inmueble/']"))
+            except Exception:
+                card_count = 0
+            if card_count < MIN_CARDS_NO_SCROLL:
+                _human_scroll(driver)
         html = driver.page_source or ""
         return (html, 200)
 
     try:
-        if driver_lock is not None and driver is not None:
-            with driver_lock:
-                return _do_fetch()
         return _do_fetch()
     finally:
         if own_driver and not attached_to_user_chrome and driver is not None:
@@ -297,63 +734,54 @@ async def fetch_html_playwright(
     """
     Fetch URL with Playwright + stealth. When connect_cdp is True, connect to CHROME_CDP_URL;
     when False, always launch. When None, connect if CHROME_CDP_URL is set.
+    Plain headless fetches use the warm page pool (no browser launch per call).
     """
-    from playwright.async_api import async_playwright
-
-    try:
-        from playwright_stealth import stealth_async
-    except ImportError:
-        stealth_async = None
-
     use_cdp = connect_cdp if connect_cdp is not None else bool(CHROME_CDP_URL)
-    delay = _random_delay(delay_before or DELAY_MIN, delay_before or DELAY_MAX)
-    await asyncio.sleep(delay)
+    if not use_cdp and not pause_for_captcha:
+        # Pool path: fetch_html_with_page applies the rate limit itself. An explicit
+        # connect_cdp=False (approach "playwright") must hold all the way down: the
+        # pool may not hand back a page on the user's attached Chrome.
+        async with _PAGE_POOL.acquire(allow_cdp=connect_cdp is not False) as page:
+            return await fetch_html_with_page(page, url, delay_before=delay_before, scroll=scroll)
 
-    async with async_playwright() as p:
-        if use_cdp and CHROME_CDP_URL:
-            try:
-                browser = await p.chromium.connect_over_cdp(CHROME_CDP_URL)
-            except Exception as e:
-                raise RuntimeError(
-                    f"Could not connect to Chrome at {CHROME_CDP_URL}. "
-                    "Start Chrome with: chrome.exe --remote-debugging-port=9222 "
-                    "(leave it open), then run this again. Error: " + str(e)
-                ) from e
-            context = browser.contexts[0] if browser.contexts else await browser.new_context()
-            page = await context.new_page()
-        else:
-            headless = HEADLESS and not pause_for_captcha
-            browser = await p.chromium.launch(headless=headless)
-            ctx_opts: dict = {
-                "viewport": {"width": 1920, "height": 1080},
-                "user_agent": (
-                    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-                ),
-            }
-            if PROXY_URL:
-                ctx_opts["proxy"] = {"server": PROXY_URL}
-            context = await browser.new_context(**ctx_opts)
-            page = await context.new_page()
-            if stealth_async:
-                await stealth_async(page)
+    await _RATE_LIMITER.wait(url, _random_delay(delay_before or DELAY_MIN, delay_before or DELAY_MAX))
+
+    p = await _get_playwright()
+    if use_cdp and CHROME_CDP_URL:
         try:
-            resp = await page.goto(url, wait_until="domcontentloaded", timeout=60000)
-            status = resp.status if resp else 0
-            if pause_for_captcha:
-                await asyncio.sleep(6)
-                import sys
-                print("Waiting 60 seconds before continuing...", file=sys.stderr, flush=True)
-                await asyncio.sleep(60)
-            if scroll and status == 200:
-                await asyncio.sleep(random.uniform(2, 5))
-                await page.evaluate(
-                    "window.scrollTo({ top: document.body.scrollHeight, behavior: 'smooth' })"
-                )
-                await asyncio.sleep(random.uniform(1, 3))
-            html = await page.content()
-        finally:
-            await browser.close()
+            browser = await p.chromium.connect_over_cdp(CHROME_CDP_URL)
+        except Exception as e:
+            raise RuntimeError(
+                f"Could not connect to Chrome at {CHROME_CDP_URL}. "
+                "Start Chrome with: chrome.exe --remote-debugging-port=9222 "
+                "(leave it open), then run this again. Error: " + str(e)
+            ) from e
+        context = browser.contexts[0] if browser.contexts else await browser.new_context()
+        page = await context.new_page()
+    else:
+        headless = HEADLESS and not pause_for_captcha
+        browser = await p.chromium.launch(headless=headless)
+        ctx_opts = {**_BASE_CTX_OPTS, "viewport": random.choice(_VIEWPORTS)}
+        context = await browser.new_context(**ctx_opts)
+        page = await context.new_page()
+        if stealth_async:
+            await stealth_async(page)
+    try:
+        resp = await page.goto(url, wait_until="domcontentloaded", timeout=60000)
+        status = resp.status if resp else 0
+        if pause_for_captcha:
+            await asyncio.sleep(6)
+            print("Waiting 60 seconds before continuing...", file=sys.stderr, flush=True)
+            await asyncio.sleep(60)
+        if scroll and status == 200:
+            await asyncio.sleep(random.uniform(2, 5))
+            await page.evaluate(
+                "window.scrollTo({ top: document.body.scrollHeight, behavior: 'smooth' })"
+            )
+            await asyncio.sleep(random.uniform(1, 3))
+        html = await _response_html(page, resp, status)
+    finally:
+        await browser.close()
     return html, status
 
 
@@ -367,73 +795,160 @@ async def fetch_html(url: str, **kwargs) -> tuple[str, int]:
     kwargs = dict(kwargs)
     page = kwargs.pop("page", None)
     driver = kwargs.pop("driver", None)
-    approach = kwargs.pop("approach", None) or resolve_approach()
+    approach_override = kwargs.pop("approach", None)
+    approach = approach_override or resolve_approach()
     pause_for_captcha = kwargs.pop("pause_for_captcha", False)
-    driver_lock = kwargs.pop("driver_lock", None)
+
+    # Fast path: when no browser/approach is forced, try a plain GET first — drops the
+    # fetch from seconds (Chromium goto + scroll + serialize) to tens of ms when Idealista
+    # serves the page without a JS challenge. Escalate to a browser on block or error.
+    _RATE_PREPAID.set("")  # any credit left over from an earlier fetch is stale
+    if (
+        page is None
+        and driver is None
+        and approach_override is None
+        and SCRAPER_APPROACH is None
+        and not pause_for_captcha
+    ):
+        async with _fetch_sem():
+            await _RATE_LIMITER.wait(url, _random_delay(kwargs.get("delay_before"), kwargs.get("delay_before")))
+            html, status = await _fetch_html_httpx(url)
+        if status == 200 and not is_blocked_page(html):
+            return html, status
+        if status in (404, 410, 451):
+            # Terminal for the retry loop: a full-browser refetch can't change it
+            return html, status
+        # Escalating: this fetch already served its human delay before the raw GET
+        _RATE_PREPAID.set(url)
+    kwargs.pop("driver_lock", None)  # accepted for compat; the per-driver executor serializes access
     extra = {
         "approach": approach,
         "pause_for_captcha": pause_for_captcha,
-        "driver_lock": driver_lock,
     }
 
     if driver is not None:
-        return await asyncio.to_thread(
-            _fetch_html_selenium_sync, driver, url, **{**kwargs, **extra}
+        # Run on the driver's dedicated thread so chromedriver's HTTP session stays warm
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _selenium_executor(driver),
+            functools.partial(_fetch_html_selenium_sync, driver, url, **{**kwargs, **extra}),
         )
     if is_selenium_like(approach) and page is None:
+        # One-shot driver: any thread will do, it is created and quit inside the call
         return await asyncio.to_thread(
             _fetch_html_selenium_sync, None, url, **{**kwargs, **extra}
         )
     if page is not None:
         return await fetch_html_with_page(page, url, **{**kwargs, "pause_for_captcha": pause_for_captcha})
     if approach == "playwright_cdp" and CHROME_CDP_URL:
-        from playwright.async_api import async_playwright
-        async with async_playwright() as p:
-            try:
-                browser = await p.chromium.connect_over_cdp(CHROME_CDP_URL)
-            except Exception:
-                return await fetch_html_playwright(url, connect_cdp=False, **{**kwargs, "pause_for_captcha": pause_for_captcha})
-            context = browser.contexts[0] if browser.contexts else await browser.new_context()
-            page = await context.new_page()
-            try:
-                return await fetch_html_with_page(page, url, **{**kwargs, "pause_for_captcha": pause_for_captcha})
-            finally:
-                await browser.close()
+        p = await _get_playwright()
+        try:
+            browser = await p.chromium.connect_over_cdp(CHROME_CDP_URL)
+        except Exception:
+            return await fetch_html_playwright(url, connect_cdp=False, **{**kwargs, "pause_for_captcha": pause_for_captcha})
+        context = browser.contexts[0] if browser.contexts else await browser.new_context()
+        page = await context.new_page()
+        try:
+            return await fetch_html_with_page(page, url, **{**kwargs, "pause_for_captcha": pause_for_captcha})
+        finally:
+            await browser.close()
     # When testing "playwright" we must launch, not connect (even if CHROME_CDP_URL is set)
     use_cdp = approach != "playwright" and bool(CHROME_CDP_URL)
     return await fetch_html_playwright(url, connect_cdp=use_cdp, **{**kwargs, "pause_for_captcha": pause_for_captcha})
 
 
+async def fetch_many(
+    urls: list[str],
+    *,
+    concurrency: int = FETCH_CONCURRENCY,
+    **kwargs,
+) -> list[tuple[str, str, int]]:
+    """
+    Fetch several URLs concurrently, returning (url, html, status) tuples in input
+    order. Each fetch goes through fetch_html (raw-HTTP fast path, warm page pool on
+    escalation) under a shared semaphore, so callers get bounded parallelism without
+    managing contexts or pages themselves. Errors yield ("", 0) for that URL.
+    """
+    sem = asyncio.Semaphore(concurrency)
+
+    async def _bounded(u: str) -> tuple[str, str, int]:
+        async with sem:
+            try:
+                html, status = await fetch_html(u, **kwargs)
+            except Exception:
+                html, status = "", 0
+        return (u, html, status)
+
+    return list(await asyncio.gather(*(_bounded(u) for u in urls)))
+
+
+class FetchResult(NamedTuple):
+    """A fetched body plus its classification, computed once per response."""
+
+    html: str
+    status: int
+    is_blocked: bool   # 200 body that matched the block-page indicators
+    is_listing: bool   # body contains listing cards (only evaluated for blocked bodies)
+
+
+def _classify(html: str, status: int) -> FetchResult:
+    """
+    Classify one response body exactly once, so call sites (and the retry loop) read
+    flags instead of re-scanning a 100-300KB body. is_listing is the block-verdict
+    rescue check — a page with real cards is never treated as blocked — and is only
+    computed when the blocked indicators matched.
+    """
+    if status != 200:
+        return FetchResult(html, status, False, False)
+    blocked = is_blocked_page(html)
+    is_listing = looks_like_listing_page(html) if blocked else True
+    return FetchResult(html, status, blocked, is_listing)
+
+
 async def fetch_html_with_retry(
     url: str,
     max_retries: int = 3,
-    backoff_sec: tuple[float, ...] = (10, 30, 60),
+    backoff_base: float = 2.0,
+    backoff_cap: float = 60.0,
     **kwargs,
-) -> tuple[str, int]:
+) -> FetchResult:
     """
-    Fetch URL with retries. Returns (html, status_code). Never raises:
-    after all retries returns last (html, status) or ("", 0) on repeated errors.
+    Fetch URL with retries. Returns a FetchResult (html, status, is_blocked, is_listing)
+    with the block/listing flags computed once per body. Never raises: after all retries
+    returns the last result or FetchResult("", 0, ...) on repeated errors.
+    Backoff is exponential with jitter (base*2**attempt capped at backoff_cap), and a
+    Retry-After header from the raw-HTTP path overrides the computed wait. Terminal
+    statuses (404/410/451) return immediately; a 200 that still looks like a block page
+    is retried with the remaining budget spent on a stealthier approach.
     """
-    last_result: tuple[str, int] = ("", 0)
+    last_result = FetchResult("", 0, False, False)
     for attempt in range(max_retries):
+        retry_after = None
         try:
             html, status = await fetch_html(url, **kwargs)
-            last_result = (html, status)
+            last_result = _classify(html, status)
+            if status in (404, 410, 451):  # gone for good; waiting won't help
+                return last_result
             if status == 200:
-                return (html, status)
+                if not last_result.is_blocked:
+                    return last_result
+                # Blocked despite 200: escalate instead of repeating the same path
+                kwargs.setdefault("approach", "playwright")
+            retry_after = _LAST_RETRY_AFTER.get()
         except Exception:
-            last_result = ("", 0)
+            last_result = FetchResult("", 0, False, False)
         if attempt < max_retries - 1:
-            wait = backoff_sec[attempt] if attempt < len(backoff_sec) else backoff_sec[-1]
+            wait = min(backoff_base * 2 ** attempt, backoff_cap) + random.uniform(0, 2)
+            if retry_after is not None:
+                wait = max(retry_after, wait)
             await asyncio.sleep(wait)
     return last_result
 
 
-def is_blocked_page(html: str) -> bool:
-    """True if response looks like DataDome/block page (enable JS, hard block, etc.)."""
-    if not html or len(html) < 500:
-        return True
-    block_indicators = [
+# Block-page needles (pre-lowercased; matched against lowercased HTML)
+_BLOCK_INDICATORS = [
+    s.lower()
+    for s in (
         "Please enable JS",
         "enable JavaScript",
         "disable any ad blocker",
@@ -449,6 +964,34 @@ def is_blocked_page(html: str) -> bool:
         "se ha detectado un uso indebido",
         "el acceso se ha bloqueado",
         "uso indebido",
-    ]
-    lower = html.lower()
-    return any(ind.lower() in lower for ind in block_indicators)
+    )
+]
+
+# Optional Aho-Corasick automaton: all needles matched in one pass over the HTML instead
+# of one full scan per needle
+try:
+    import ahocorasick_rs as _ahocorasick
+    _BLOCK_AC = _ahocorasick.AhoCorasick(_BLOCK_INDICATORS)
+except ImportError:
+    _BLOCK_AC = None
+
+
+_MAX_INDICATOR_LEN = max(len(ind) for ind in _BLOCK_INDICATORS)
+_BLOCK_SCAN_CHUNK = 65536
+
+
+def is_blocked_page(html: str) -> bool:
+    """True if response looks like DataDome/block page (enable JS, hard block, etc.)."""
+    if not html or len(html) < 500:
+        return True
+    if _BLOCK_AC is not None:
+        return bool(_BLOCK_AC.find_matches_as_indexes(html.lower()))
+    # Fallback: scan in windows, lowercasing one chunk at a time instead of copying the
+    # whole document first; windows overlap by the longest needle so a match straddling
+    # a boundary is still found, and the first hit short-circuits.
+    overlap = _MAX_INDICATOR_LEN - 1
+    for start in range(0, len(html), _BLOCK_SCAN_CHUNK):
+        window = html[start : start + _BLOCK_SCAN_CHUNK + overlap].lower()
+        if any(ind in window for ind in _BLOCK_INDICATORS):
+            return True
+    return False
@@ -7,12 +7,14 @@ When not using ScrapFly, reuses one Playwright browser for the whole run (faster
 import asyncio
 import logging
 import math
-import random
+import os
+from concurrent.futures import ProcessPoolExecutor
 from typing import Any, Callable, Optional
 
 from idealista_scraper.approaches import is_selenium_like, resolve_approach
 from idealista_scraper.config import (
     CHROME_CDP_URL,
+    DETAIL_CONCURRENCY,
     IDEALISTA_BASE_URL,
     IDEALISTA_DOMAIN,
     IDEALISTA_MAX_PAGE,
@@ -20,19 +22,79 @@ from idealista_scraper.config import (
     MAX_PAGES,
     PAGE_DELAY_SEC,
     PAUSE_FOR_CAPTCHA,
-    PROXY_URL,
 )
 from urllib.parse import urlparse
+from idealista_scraper.dedup import ContentSeen, Deduplicator, content_digest
 from idealista_scraper.export import normalize_listing_link
-from idealista_scraper.fetcher import fetch_html_with_retry, is_blocked_page
+from idealista_scraper.fetcher import fetch_html_with_retry
 from idealista_scraper.parsers import (
     ListingCard,
-    looks_like_listing_page,
     parse_detail_page,
     parse_search_page,
 )
 
 
+# parse_detail_page is pure CPU; on detail-heavy runs it competes with the event loop
+# for the GIL and stalls in-flight fetches. Big bodies go to a small process pool
+# (created on first use, reused for the process lifetime); bodies under the threshold
+# parse inline since IPC + pickling would cost more than the parse.
+_PARSE_POOL: Optional[ProcessPoolExecutor] = None
+_PARSE_POOL_MIN_HTML = 20_000
+
+
+def _parse_pool() -> ProcessPoolExecutor:
+    global _PARSE_POOL
+    if _PARSE_POOL is None:
+        _PARSE_POOL = ProcessPoolExecutor(max_workers=min(4, os.cpu_count() or 1))
+    return _PARSE_POOL
+
+
+async def _parse_detail_offloaded(html: str, url: str) -> Any:
+    """parse_detail_page off the event loop; falls back inline if the pool dies."""
+    global _PARSE_POOL
+    if len(html) < _PARSE_POOL_MIN_HTML:
+        return parse_detail_page(html, url=url)
+    loop = asyncio.get_running_loop()
+    try:
+        # Only (html, url) cross the process boundary; DetailListing pickles back cheaply
+        return await loop.run_in_executor(_parse_pool(), parse_detail_page, html, url)
+    except (OSError, RuntimeError):  # pool broken / spawn unsupported: parse inline from now on
+        if _PARSE_POOL is not None:
+            _PARSE_POOL.shutdown(wait=False, cancel_futures=True)
+            _PARSE_POOL = None
+        return parse_detail_page(html, url=url)
+
+
+_BUFFER_DONE = object()
+
+
+async def _buffered(gen: Any, n: int = 1):
+    """
+    Consume an async generator through an n-slot buffer: the producer keeps running
+    while the consumer processes the current item, so the next search-page fetch is
+    already in flight during detail processing.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=n)
+
+    async def _producer() -> None:
+        try:
+            async for item in gen:
+                await queue.put(item)
+        finally:
+            await queue.put(_BUFFER_DONE)
+
+    task = asyncio.create_task(_producer())
+    try:
+        while True:
+            item = await queue.get()
+            if item is _BUFFER_DONE:
+                break
+            yield item
+        await task  # surface producer exceptions
+    finally:
+        task.cancel()
+
+
 async def _run_with_fetcher(
     base_url: str,
     max_pages: int,
@@ -41,29 +103,26 @@ async def _run_with_fetcher(
     on_record: Optional[Callable[[dict[str, Any]], None]],
     fetch_kwargs: dict[str, Any],
     on_restart_browser: Optional[Callable[[], Any]] = None,
+    last_seen_page: int = 0,
+    resume: bool = True,
 ) -> list[dict[str, Any]]:
     """Core run logic; fetch_kwargs are passed to every fetch_html_with_retry (e.g. page=page)."""
     log = logging.getLogger(__name__)
-    all_cards: list[ListingCard] = []
     total_count = 0
     total_pages = 1
 
     # Page 1: long 200 = likely real content; block pages are usually short
     first_fetch_kwargs = {**fetch_kwargs, "pause_for_captcha": PAUSE_FOR_CAPTCHA}
-    html, status = await fetch_html_with_retry(base_url + "/", **first_fetch_kwargs)
-    long_ok = status == 200 and len(html) >= 12_000
-    blocked = (
-        status != 200
-        or (not long_ok and is_blocked_page(html) and not looks_like_listing_page(html))
-    )
+    res = await fetch_html_with_retry(base_url + "/", **first_fetch_kwargs)
+    long_ok = res.status == 200 and len(res.html) >= 12_000
+    blocked = res.status != 200 or (not long_ok and res.is_blocked and not res.is_listing)
     if blocked:
         raise RuntimeError(
-            f"First page failed (status={status}) or blocked after retries. "
+            f"First page failed (status={res.status}) or blocked after retries. "
             "Idealista is blocking the request. Try: set HEADLESS=false in .env, use PROXY_URL (residential proxy), "
             "or run from another network. Run --live-test to verify."
         )
-    total_count, page_cards = parse_search_page(html, base_url=IDEALISTA_DOMAIN)
-    all_cards.extend(page_cards)
+    total_count, page_cards = parse_search_page(res.html, base_url=IDEALISTA_DOMAIN)
     log.info("Page 1: %s cards (total_count=%s)", len(page_cards), total_count)
     # Idealista shows "30" in the h1 on page 1 sometimes; use parsed total only when > 30.
     # Otherwise always try up to IDEALISTA_MAX_PAGE (60); pages 61+ redirect to page 1.
@@ -73,73 +132,185 @@ async def _run_with_fetcher(
         total_pages = min(IDEALISTA_MAX_PAGE, max_pages)
     first_page_first_link = (page_cards[0].link if page_cards else None)
 
-    # When resuming (already_seen non-empty), start from the page after the last full page of 30
-    # e.g. 238 existing -> start at page 8 so we don't re-fetch pages 2-7
+    # When resuming, start right after the last page recorded in the output (each record
+    # carries its _source_page). Older output without that column falls back to the
+    # rows/30 estimate; either way the seen-links set still filters mixed pages.
     start_page = 1
-    if already_seen and total_pages > 1:
+    if last_seen_page > 0 and total_pages > 1:
+        start_page = min(total_pages, last_seen_page + 1)
+        if start_page > 1:
+            log.info("Resuming from page %s (last saved page was %s).", start_page, last_seen_page)
+    elif already_seen and total_pages > 1:
         start_page = min(total_pages, (len(already_seen) // 30) + 1)
         if start_page > 1:
             log.info("Resuming from page %s (%s listings already in output).", start_page, len(already_seen))
 
     results: list[dict[str, Any]] = []
-    processed_links: set[str] = set()
+    # Canonical URLs are interned to int ids; the processed set holds ints so every
+    # membership check hashes 8 bytes instead of a ~100-char URL
+    dedup = Deduplicator()
+    processed_link_ids: set[int] = set()
+    # Same flat republished under another listing ID: skip its detail fetch. The digest
+    # store persists across runs, but a fresh (--no-resume) run must not inherit it —
+    # the user asked for everything to be scraped again.
+    content_seen = ContentSeen(use_persisted=resume) if fetch_details else None
+
+    # Dedup state persists across pages: raw links are checked first so cards seen on an
+    # earlier scan skip normalization entirely (cheap set hit instead of URL surgery)
+    seen_raw_links: set[str] = set()
 
     def _dedupe_unique(cards: list[ListingCard]) -> list[ListingCard]:
-        seen_links: set[str] = set()
         out: list[ListingCard] = []
         for c in cards:
-            canonical = normalize_listing_link(c.link) if c.link else ""
-            if not canonical or canonical in already_seen or canonical in seen_links:
+            raw = c.link
+            if not raw or raw in seen_raw_links:
+                continue
+            seen_raw_links.add(raw)
+            canonical = normalize_listing_link(raw)
+            if not canonical or canonical in already_seen:
+                continue
+            _, was_new = dedup.register(canonical)
+            if not was_new:  # a differently-written link normalized to a known URL
                 continue
-            seen_links.add(canonical)
             out.append(c)
         return out
 
-    async def _process_cards(cards_to_process: list[ListingCard]) -> None:
-        for idx, card in enumerate(cards_to_process, 1):
-            canonical_link = normalize_listing_link(card.link)
-            if canonical_link in processed_links:
-                continue
-            processed_links.add(canonical_link)
-            # Prefer canonical URL for fetch so we get consistent (Spanish) content
-            fetch_url = canonical_link if canonical_link else card.link
-            log.info("Fetching detail: %s", fetch_url[:70])
-            html, status = await fetch_html_with_retry(
+    # on_record typically writes to disk; calling it inline would stall the event loop
+    # (and every in-flight fetch) on each write. Records go through a queue instead and
+    # a background task flushes batches of up to 32 in a worker thread.
+    record_queue: Optional[asyncio.Queue] = None
+    writer_task: Optional[asyncio.Task] = None
+    if on_record is not None and fetch_details:
+        record_queue = asyncio.Queue()
+
+        def _write_batch(batch: list[dict[str, Any]]) -> None:
+            for r in batch:
+                on_record(r)
+
+        async def _writer_loop() -> None:
+            while True:
+                item = await record_queue.get()
+                if item is None:
+                    return
+                batch = [item]
+                while not record_queue.empty() and len(batch) < 32:
+                    nxt = record_queue.get_nowait()
+                    if nxt is None:
+                        await asyncio.to_thread(_write_batch, batch)
+                        return
+                    batch.append(nxt)
+                await asyncio.to_thread(_write_batch, batch)
+
+        writer_task = asyncio.create_task(_writer_loop())
+
+    def _emit(d: dict[str, Any]) -> None:
+        """Record a finished listing: queue it for the writer (or call on_record inline)."""
+        results.append(d)
+        if record_queue is not None:
+            if writer_task.done():
+                exc = writer_task.exception()
+                if exc is not None:  # writer died (e.g. disk error): fail the run now
+                    raise exc
+            record_queue.put_nowait(d)
+        elif on_record:
+            on_record(d)
+
+    async def _drain_records() -> None:
+        """Flush remaining queued records and stop the writer (end of run)."""
+        if record_queue is not None:
+            record_queue.put_nowait(None)
+            await writer_task
+
+    # Detail fetches are independent I/O, so run them concurrently under a semaphore.
+    # A shared Playwright page can only run one goto at a time, so that path stays serial.
+    page_is_shared = "page" in fetch_kwargs
+    detail_sem = asyncio.Semaphore(1 if page_is_shared else DETAIL_CONCURRENCY)
+
+    async def _fetch_search_page(url: str) -> Any:
+        """
+        Search-page fetch for the pagination producer. On a shared page it must hold
+        the same slot as the detail gotos: the producer runs concurrently with detail
+        processing, and two gotos on one page abort each other's navigation.
+        """
+        if page_is_shared:
+            async with detail_sem:
+                return await fetch_html_with_retry(url, **fetch_kwargs)
+        return await fetch_html_with_retry(url, **fetch_kwargs)
+
+    async def _fetch_detail(card: ListingCard, canonical_link: str, page_num: int) -> dict[str, Any]:
+        # Prefer canonical URL for fetch so we get consistent (Spanish) content
+        fetch_url = canonical_link if canonical_link else card.link
+        log.info("Fetching detail: %s", fetch_url[:70])
+        async with detail_sem:
+            res = await fetch_html_with_retry(
                 fetch_url, delay_before=10, **fetch_kwargs
             )
-            # Only skip detail when the request failed (non-200). Always parse when status=200 so we
-            # extract whatever we can (block pages often still have JSON or partial HTML we can use).
-            if status != 200:
-                log.warning("Detail failed for %s (status=%s), saving card only.", fetch_url[:60], status)
-                d = {**card.to_dict(), "link": canonical_link}
-                if on_record:
-                    on_record(d)
-                results.append(d)
+        # Only skip detail when the request failed (non-200). Always parse when status=200 so we
+        # extract whatever we can (block pages often still have JSON or partial HTML we can use).
+        if res.status != 200:
+            log.warning("Detail failed for %s (status=%s), saving card only.", fetch_url[:60], res.status)
+            d: dict[str, Any] = {}
+            card.fill_dict(d)
+            d["link"] = canonical_link
+            d["_source_page"] = page_num
+            return d
+        detail = await _parse_detail_offloaded(res.html, fetch_url)
+        # Build the merged record in place: no card dict + detail dict + spread copy
+        merged: dict[str, Any] = {}
+        card.fill_dict(merged)
+        merged["link"] = canonical_link
+        merged["_source_page"] = page_num
+        detail_d: dict[str, Any] = {}
+        detail.fill_dict(detail_d)
+        merged["detail"] = detail_d
+        feats = detail_d["features"] or {}
+        rooms = feats.get("rooms")
+        if isinstance(rooms, (list, tuple)) and rooms:
+            try:
+                merged["rooms"] = int(rooms[0])
+            except (ValueError, TypeError):
+                pass
+        sq_meters = feats.get("sq_meters")
+        if isinstance(sq_meters, (list, tuple)) and sq_meters:
+            try:
+                merged["sq_meters"] = int(sq_meters[0])
+            except (ValueError, TypeError):
+                pass
+        if detail_d["location"]:
+            merged["location"] = detail_d["location"]
+        return merged
+
+    async def _process_cards(cards_to_process: list[ListingCard], page_num: int) -> None:
+        tasks: list[asyncio.Task] = []
+        for card in cards_to_process:
+            canonical_link = normalize_listing_link(card.link)
+            link_id, _ = dedup.register(canonical_link)
+            if link_id in processed_link_ids:
                 continue
-            detail = parse_detail_page(html, url=fetch_url)
-            merged = {**card.to_dict(), "link": canonical_link, "detail": detail.to_dict()}
-            detail_d = detail.to_dict()
-            feats = (detail_d.get("features") or {})
-            if feats.get("rooms"):
-                try:
-                    merged["rooms"] = int(feats["rooms"][0]) if feats["rooms"] else merged.get("rooms")
-                except (ValueError, IndexError, TypeError):
-                    pass
-            if feats.get("sq_meters"):
-                try:
-                    merged["sq_meters"] = int(feats["sq_meters"][0]) if feats["sq_meters"] else merged.get("sq_meters")
-                except (ValueError, IndexError, TypeError):
-                    pass
-            if detail_d.get("location"):
-                merged["location"] = detail_d["location"]
-            if on_record:
-                on_record(merged)
-            results.append(merged)
+            processed_link_ids.add(link_id)
+            if card.description and content_seen is not None:
+                digest = content_digest(card.description, card.price, card.location)
+                if content_seen.seen_or_add(digest):
+                    log.info("Duplicate content for %s, skipping detail fetch.", card.link[:60])
+                    d = {}
+                    card.fill_dict(d)
+                    d["link"] = canonical_link
+                    d["_source_page"] = page_num
+                    d["duplicate_content"] = True
+                    _emit(d)
+                    continue
+            tasks.append(asyncio.create_task(_fetch_detail(card, canonical_link, page_num)))
+        # Emit each record as soon as its fetch completes, not in submission order
+        for fut in asyncio.as_completed(tasks):
+            _emit(await fut)
 
     if not fetch_details:
-        unique_cards = _dedupe_unique(all_cards)
+        unique_cards = _dedupe_unique(page_cards)
         for c in unique_cards:
-            d = {**c.to_dict(), "link": normalize_listing_link(c.link)}
+            d = {}
+            c.fill_dict(d)
+            d["link"] = normalize_listing_link(c.link)
+            d["_source_page"] = 1
             if on_record:
                 on_record(d)
             results.append(d)
@@ -147,73 +318,101 @@ async def _run_with_fetcher(
 
     # Process page 1 cards only if we're not resuming from a later page
     if start_page <= 1:
-        unique_so_far = _dedupe_unique(all_cards)
-        to_process = [c for c in unique_so_far if normalize_listing_link(c.link) not in processed_links]
+        # _dedupe_unique only yields never-before-seen cards (and _process_cards guards
+        # again via processed_link_ids), so no extra filtering pass is needed
+        to_process = _dedupe_unique(page_cards)
         if to_process:
             log.info("Processing %s listings from page 1 (fetching details and writing).", len(to_process))
-            await _process_cards(to_process)
+            await _process_cards(to_process, 1)
 
     # Pages 2..N (or start_page..N when resuming): optional delay, fetch, parse-first, retry once if blocked
     PAGE_BLOCK_RETRY_BACKOFF_SEC = 60
     CONSECUTIVE_BLOCKED_BEFORE_STOP = 2  # stop pagination after this many blocked pages (saves time)
-    consecutive_blocked = 0
-    for page_num in range(2, total_pages + 1):
-        if page_num < start_page:
-            continue  # skip already-done pages when resuming
-        if PAGE_DELAY_SEC > 0:
-            await asyncio.sleep(PAGE_DELAY_SEC)
-        url = f"{base_url}/pagina-{page_num}.htm"
-        html, status = await fetch_html_with_retry(url, **fetch_kwargs)
-        if status != 200:
-            log.warning("Page %s failed (status=%s), skipping.", page_num, status)
-            consecutive_blocked = 0
-            continue
-        _, page_cards = parse_search_page(html, base_url=IDEALISTA_DOMAIN)
-        if not page_cards and is_blocked_page(html):
-            # Close browser and start fresh, then wait before retry (often unblocks)
-            if on_restart_browser:
-                try:
-                    await asyncio.to_thread(on_restart_browser)
-                    log.info("Restarted browser; waiting %ss before retry.", PAGE_BLOCK_RETRY_BACKOFF_SEC)
-                except Exception as e:
-                    log.warning("Browser restart failed: %s", e)
-            else:
-                log.info("Page %s looks blocked (0 cards), retrying once after %ss.", page_num, PAGE_BLOCK_RETRY_BACKOFF_SEC)
-            await asyncio.sleep(PAGE_BLOCK_RETRY_BACKOFF_SEC)
-            html, status = await fetch_html_with_retry(url, **fetch_kwargs)
-            if status != 200:
-                log.warning("Page %s failed on retry (status=%s), skipping.", page_num, status)
+
+    # Duplicate-page detection: past the true last page Idealista silently redirects to
+    # page 1 (or re-serves an earlier page), so a mis-parsed total_count would otherwise
+    # cost up to IDEALISTA_MAX_PAGE redundant fetches
+    DUPLICATE_LINK_OVERLAP = 15  # shared links with the previous page before we stop
+
+    async def _iter_search_pages():
+        """Yield (page_num, page_cards) for pages 2..N, with the blocked-retry logic."""
+        consecutive_blocked = 0
+        prev_page_links: set[str] = set()
+        seen_first_links: set[str] = {first_page_first_link} if first_page_first_link else set()
+        for page_num in range(2, total_pages + 1):
+            if page_num < start_page:
+                continue  # skip already-done pages when resuming
+            if PAGE_DELAY_SEC > 0:
+                await asyncio.sleep(PAGE_DELAY_SEC)
+            url = f"{base_url}/pagina-{page_num}.htm"
+            res = await _fetch_search_page(url)
+            if res.status != 200:
+                log.warning("Page %s failed (status=%s), skipping.", page_num, res.status)
                 consecutive_blocked = 0
                 continue
-            _, page_cards = parse_search_page(html, base_url=IDEALISTA_DOMAIN)
-            if not page_cards and is_blocked_page(html):
-                consecutive_blocked += 1
-                log.warning(
-                    "Page %s failed (status=200). Idealista has blocked access (this is a full block, not a captcha to solve).",
-                    page_num,
-                )
-                if consecutive_blocked >= CONSECUTIVE_BLOCKED_BEFORE_STOP:
+            _, page_cards = parse_search_page(res.html, base_url=IDEALISTA_DOMAIN)
+            if not page_cards and res.is_blocked:
+                # Close browser and start fresh, then wait before retry (often unblocks)
+                if on_restart_browser:
+                    try:
+                        await asyncio.to_thread(on_restart_browser)
+                        log.info("Restarted browser; waiting %ss before retry.", PAGE_BLOCK_RETRY_BACKOFF_SEC)
+                    except Exception as e:
+                        log.warning("Browser restart failed: %s", e)
+                else:
+                    log.info("Page %s looks blocked (0 cards), retrying once after %ss.", page_num, PAGE_BLOCK_RETRY_BACKOFF_SEC)
+                await asyncio.sleep(PAGE_BLOCK_RETRY_BACKOFF_SEC)
+                res = await _fetch_search_page(url)
+                if res.status != 200:
+                    log.warning("Page %s failed on retry (status=%s), skipping.", page_num, res.status)
+                    consecutive_blocked = 0
+                    continue
+                _, page_cards = parse_search_page(res.html, base_url=IDEALISTA_DOMAIN)
+                if not page_cards and res.is_blocked:
+                    consecutive_blocked += 1
                     log.warning(
-                        "Stopping pagination after %s consecutive blocked pages. To continue: use PROXY_URL (e.g. residential proxy), try a different network, or set HEADLESS=false and run in smaller batches.",
-                        CONSECUTIVE_BLOCKED_BEFORE_STOP,
+                        "Page %s failed (status=200). Idealista has blocked access (this is a full block, not a captcha to solve).",
+                        page_num,
                     )
-                    break
+                    if consecutive_blocked >= CONSECUTIVE_BLOCKED_BEFORE_STOP:
+                        log.warning(
+                            "Stopping pagination after %s consecutive blocked pages. To continue: use PROXY_URL (e.g. residential proxy), try a different network, or set HEADLESS=false and run in smaller batches.",
+                            CONSECUTIVE_BLOCKED_BEFORE_STOP,
+                        )
+                        return
+                    continue
+            if not page_cards:
+                log.warning("Page %s returned 0 cards, skipping (continuing to next page).", page_num)
                 continue
-        if not page_cards:
-            log.warning("Page %s returned 0 cards, skipping (continuing to next page).", page_num)
-            continue
-        consecutive_blocked = 0  # success: reset so we only stop after consecutive blocks
-        log.info("Page %s: %s cards", page_num, len(page_cards))
-        if first_page_first_link and page_cards[0].link == first_page_first_link:
-            log.info("Page %s is duplicate of page 1 (redirect), stopping pagination.", page_num)
-            break
-        all_cards.extend(page_cards)
-        unique_so_far = _dedupe_unique(all_cards)
-        to_process = [c for c in unique_so_far if normalize_listing_link(c.link) not in processed_links]
+            consecutive_blocked = 0  # success: reset so we only stop after consecutive blocks
+            log.info("Page %s: %s cards", page_num, len(page_cards))
+            page_links = {c.link for c in page_cards}
+            if len(prev_page_links & page_links) > DUPLICATE_LINK_OVERLAP:
+                log.info("Page %s mostly repeats page %s (past the last real page), stopping pagination.", page_num, page_num - 1)
+                return
+            first_link = page_cards[0].link
+            if first_link and first_link in seen_first_links:
+                log.info("Page %s is a duplicate of an earlier page (redirect), stopping pagination.", page_num)
+                return
+            seen_first_links.add(first_link)
+            prev_page_links = page_links
+            yield page_num, page_cards
+
+    # 1-slot buffer: page N+1's fetch runs while page N's details are being processed.
+    # Nothing accumulates the raw cards: once a page's records are emitted, its
+    # ListingCard objects (and the seen-link bookkeeping) are all that survive, so parsed
+    # pages become garbage as soon as they're processed.
+    async for page_num, page_cards in _buffered(_iter_search_pages(), 1):
+        # Dedup only the just-fetched page: earlier pages are already in the seen sets,
+        # so there is no point rescanning the whole accumulated list every iteration
+        to_process = _dedupe_unique(page_cards)
         if to_process:
             log.info("Processing %s new listings from page %s (fetching details and writing).", len(to_process), page_num)
-            await _process_cards(to_process)
+            await _process_cards(to_process, page_num)
 
+    await _drain_records()
+    if content_seen is not None:
+        content_seen.save()
     log.info("Done: %s total records written.", len(results))
     return results
 
@@ -224,10 +423,14 @@ async def run(
     fetch_details: bool = False,
     seen_urls: Optional[set[str]] = None,
     on_record: Optional[Callable[[dict[str, Any]], None]] = None,
+    last_seen_page: int = 0,
+    resume: bool = True,
 ) -> list[dict[str, Any]]:
     """
     Scrape listing cards from search pages, optionally fetch each detail page.
     Deduplicates by link. If seen_urls is provided, skips cards whose link is in that set (resume).
+    If last_seen_page > 0 (from the output's source_page column), pagination resumes right after it.
+    resume=False starts from scratch: the persisted content-digest store is ignored too.
     If on_record is provided, calls it with each record as soon as it is ready (incremental write).
     Reuses one Playwright browser for the whole run.
     Returns list of dicts (card to_dict, merged with detail if fetch_details) for this run.
@@ -241,9 +444,16 @@ async def run(
     if is_selenium_like(approach):
         import sys
         import threading
+        from concurrent.futures import ThreadPoolExecutor
         from selenium import webdriver
         from selenium.webdriver.chrome.options import Options
 
+        from idealista_scraper.fetcher import (
+            _BROWSER_VER_RE,
+            _retire_selenium_executor,
+            _stealth_options,
+        )
+
         # When pausing for captcha, browser must be visible
         headless = HEADLESS and not PAUSE_FOR_CAPTCHA
 
@@ -252,7 +462,6 @@ async def run(
         attached = False
         if approach == "undetected":
             try:
-                import re
                 import undetected_chromedriver as uc
                 # Avoid "OSError: [WinError 6] The handle is invalid" in Chrome.__del__ on Windows
                 _uc_chrome_del = getattr(uc.Chrome, "__del__", None)
@@ -270,7 +479,7 @@ async def run(
                 approach = "selenium"
             except Exception as e:
                 err = str(e)
-                match = re.search(r"Current browser version is (\d+)", err, re.I)
+                match = _BROWSER_VER_RE.search(err)
                 if match and ("version" in err.lower() or "chromedriver" in err.lower()):
                     try:
                         version_main = int(match.group(1))
@@ -283,12 +492,12 @@ async def run(
                     approach = "selenium"
 
         if driver is None:
-            opts = Options()
             if CHROME_CDP_URL:
                 parsed = urlparse(CHROME_CDP_URL)
                 host = parsed.hostname or "127.0.0.1"
                 port = parsed.port or 9222
                 addr = f"{host}:{port}"
+                opts = Options()
                 opts.add_experimental_option("debuggerAddress", addr)
                 try:
                     driver = webdriver.Chrome(options=opts)
@@ -301,62 +510,42 @@ async def run(
                             "To use your own Chrome: close it, then start with chrome.exe --remote-debugging-port=9222",
                             file=sys.stderr,
                         )
-                        opts = Options()
-                        opts.add_argument("--disable-blink-features=AutomationControlled")
-                        opts.add_argument("--disable-infobars")
-                        opts.add_argument("--no-first-run")
-                        if headless:
-                            opts.add_argument("--headless=new")
-                        opts.add_argument(
-                            "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                            "(KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
-                        )
-                        if PROXY_URL:
-                            opts.add_argument(f"--proxy-server={PROXY_URL}")
-                        driver = webdriver.Chrome(options=opts)
+                        driver = webdriver.Chrome(options=_stealth_options(headless))
                     else:
                         raise
             else:
-                opts.add_argument("--disable-blink-features=AutomationControlled")
-                opts.add_argument("--disable-infobars")
-                opts.add_argument("--no-first-run")
-                if headless:
-                    opts.add_argument("--headless=new")
-                opts.add_argument(
-                    "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                    "(KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
-                )
-                if PROXY_URL:
-                    opts.add_argument(f"--proxy-server={PROXY_URL}")
-                driver = webdriver.Chrome(options=opts)
+                driver = webdriver.Chrome(options=_stealth_options(headless))
 
         fetch_kwargs = {"driver": driver, "approach": approach, "driver_lock": driver_lock}
 
         def _make_new_driver() -> Any:
             """Create a fresh Chrome driver (no CDP attach) for restart-after-block."""
-            opts = Options()
-            opts.add_argument("--disable-blink-features=AutomationControlled")
-            opts.add_argument("--disable-infobars")
-            opts.add_argument("--no-first-run")
-            if headless:
-                opts.add_argument("--headless=new")
-            opts.add_argument(
-                "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                "(KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
-            )
-            if PROXY_URL:
-                opts.add_argument(f"--proxy-server={PROXY_URL}")
-            return webdriver.Chrome(options=opts)
+            return webdriver.Chrome(options=_stealth_options(headless))
+
+        def _quit_quiet(d: Any) -> None:
+            try:
+                d.quit()
+            except Exception:
+                pass
+
+        # Hot spare: a replacement Chrome is always starting in the background, so a
+        # restart-after-block swaps drivers instantly instead of stalling the loop for
+        # Chrome startup (which then overlaps the post-restart backoff sleep anyway).
+        restart_pool = ThreadPoolExecutor(max_workers=2)
+        spare_driver_future = restart_pool.submit(_make_new_driver)
 
         def restart_browser_sync() -> None:
-            nonlocal driver
-            if driver is not None:
-                try:
-                    driver.quit()
-                except (OSError, Exception):
-                    pass
-                driver = None
-            driver = _make_new_driver()
+            nonlocal driver, spare_driver_future
+            old = driver
+            driver = None
+            if old is not None:
+                _retire_selenium_executor(old)  # its worker thread would leak otherwise
+                restart_pool.submit(_quit_quiet, old)  # teardown off the caller's path
+            try:
+                driver = spare_driver_future.result()
+            except Exception:  # spare failed to launch; fall back to launching inline
+                driver = _make_new_driver()
+            spare_driver_future = restart_pool.submit(_make_new_driver)
             fetch_kwargs["driver"] = driver
 
         try:
@@ -368,8 +557,19 @@ async def run(
                 on_record,
                 fetch_kwargs,
                 on_restart_browser=restart_browser_sync,
+                last_seen_page=last_seen_page,
+                resume=resume,
             )
         finally:
+            # The pending spare (if it ever launched) is a real Chrome; reap it too
+            if not spare_driver_future.cancel():
+                try:
+                    _quit_quiet(spare_driver_future.result(timeout=60))
+                except Exception:
+                    pass
+            restart_pool.shutdown(wait=False)
+            if driver is not None:
+                _retire_selenium_executor(driver)
             if not attached and driver is not None:
                 try:
                     driver.quit()
@@ -380,15 +580,10 @@ async def run(
                 driver = None
 
     # Playwright path (playwright or playwright_cdp)
-    from playwright.async_api import async_playwright
+    if approach == "playwright_cdp" and CHROME_CDP_URL:
+        from playwright.async_api import async_playwright
 
-    try:
-        from playwright_stealth import stealth_async
-    except ImportError:
-        stealth_async = None
-
-    async with async_playwright() as p:
-        if approach == "playwright_cdp" and CHROME_CDP_URL:
+        async with async_playwright() as p:
             try:
                 browser = await p.chromium.connect_over_cdp(CHROME_CDP_URL)
             except Exception as e:
@@ -399,35 +594,37 @@ async def run(
                 ) from e
             context = browser.contexts[0] if browser.contexts else await browser.new_context()
             page = await context.new_page()
-        else:
-            browser = await p.chromium.launch(headless=HEADLESS)
-            viewports = (
-                {"width": 1920, "height": 1080},
-                {"width": 1536, "height": 864},
-                {"width": 1440, "height": 900},
-                {"width": 1366, "height": 768},
-            )
-            ctx_opts: dict = {
-                "viewport": random.choice(viewports),
-                "user_agent": (
-                    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                    "(KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
-                ),
-            }
-            if PROXY_URL:
-                ctx_opts["proxy"] = {"server": PROXY_URL}
-            context = await browser.new_context(**ctx_opts)
-            page = await context.new_page()
-            if stealth_async:
-                await stealth_async(page)
-        try:
-            return await _run_with_fetcher(
-                base_url,
-                max_pages,
-                fetch_details,
-                already_seen,
-                on_record,
-                {"page": page},
-            )
-        finally:
-            await browser.close()
+            try:
+                return await _run_with_fetcher(
+                    base_url,
+                    max_pages,
+                    fetch_details,
+                    already_seen,
+                    on_record,
+                    {"page": page},
+                    last_seen_page=last_seen_page,
+                    resume=resume,
+                )
+            finally:
+                await browser.close()
+
+    # Plain playwright: fetches go through the fetcher's warm page pool, so each
+    # concurrent detail fetch acquires its own stealthed page instead of all fetches
+    # sharing one page. Nothing to construct here; just tear the pool down at the end.
+    from idealista_scraper.fetcher import _PAGE_POOL, aclose_http_client, stop_playwright
+
+    try:
+        return await _run_with_fetcher(
+            base_url,
+            max_pages,
+            fetch_details,
+            already_seen,
+            on_record,
+            {},
+            last_seen_page=last_seen_page,
+            resume=resume,
+        )
+    finally:
+        await _PAGE_POOL.close()
+        await stop_playwright()
+        await aclose_http_client()
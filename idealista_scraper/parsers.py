@@ -1,11 +1,20 @@
 """Parse Idealista search and detail HTML. All selectors live in selectors.py."""
+import functools
 import json
 import re
+import threading
 from dataclasses import dataclass, field
 from typing import Any
 from urllib.parse import urlparse
 
-from parsel import Selector
+from lxml import etree
+from lxml import html as lxml_html
+from parsel.csstranslator import HTMLTranslator
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from idealista_scraper.selectors import (
     CARD_CURRENCY,
@@ -62,70 +71,229 @@ from idealista_scraper.selectors import (
 )
 
 
+# Compiled selector cache: element.xpath(expr) re-parses the expression string on every
+# call, so the ~30 constant selectors would be recompiled per card. etree.XPath objects
+# are compiled once and invoked directly on lxml elements; CSS selectors go through
+# parsel's translator (which understands ::text / ::attr) into the same cache.
+@functools.lru_cache(maxsize=512)
+def _xp(expr: str) -> "etree.XPath":
+    return etree.XPath(expr)
+
+
+@functools.lru_cache(maxsize=512)
+def _css(expr: str) -> "etree.XPath":
+    return etree.XPath(HTMLTranslator().css_to_xpath(expr))
+
+
+def _first(vals: list) -> str:
+    """First result of a compiled-XPath string query, or ''."""
+    return vals[0] if vals else ""
+
+
+# One tuned parser per thread instead of a fresh default parser per document.
+# remove_comments drops Idealista's many embedded comment nodes before any XPath
+# walks the tree; remove_blank_text is deliberately NOT set because it would change
+# the text-node joins (descriptions, feature items) that callers rely on. Parsers
+# hold mutable state during a parse, hence thread-local rather than module-global.
+_PARSER_LOCAL = threading.local()
+
+
+def _html_parser() -> "lxml_html.HTMLParser":
+    parser = getattr(_PARSER_LOCAL, "parser", None)
+    if parser is None:
+        parser = lxml_html.HTMLParser(recover=True, remove_comments=True, huge_tree=True)
+        _PARSER_LOCAL.parser = parser
+    return parser
+
+
+def _parse_html(html: str) -> Any:
+    """
+    Parse HTML into a single lxml root. Parsing is the dominant CPU cost on big pages,
+    so callers that need both classification and extraction parse once and pass the
+    root to parse_search_page/parse_detail_page instead of rebuilding the tree.
+    """
+    parser = _html_parser()
+    if not html or not html.strip():
+        return lxml_html.fromstring("<html></html>", parser=parser)
+    try:
+        return lxml_html.fromstring(html, parser=parser)
+    except ValueError:  # str with an explicit encoding declaration: let lxml re-decode
+        return lxml_html.fromstring(html.encode("utf-8"), parser=parser)
+    except etree.ParserError:  # nothing parseable at all
+        return lxml_html.fromstring("<html></html>", parser=parser)
+
+
+# All scalar card fields in one compiled XPath: concat() with a sentinel separator
+# returns every field's string-value (string() = first match, like .get()) in a single
+# subtree traversal, instead of one walk per field. List-valued fields (details, tags)
+# and the ad check keep their own compiled expressions. (The sentinel must be an XML-
+# compatible character — control chars are rejected — so use the US glyph, which never
+# appears in card content.)
+_CARD_FIELD_SEP = "␟"
+_CARD_SCALAR_EXPRS = (
+    CARD_TITLE,
+    CARD_LINK,
+    CARD_LINK_FALLBACK,
+    CARD_PRICE,
+    CARD_CURRENCY,
+    CARD_DESCRIPTION,
+    CARD_SELLER_TITLE,
+    CARD_SELLER_HREF,
+)
+_CARD_SCALARS_XP = etree.XPath(
+    "concat("
+    + f", '{_CARD_FIELD_SEP}', ".join(f"string({expr})" for expr in _CARD_SCALAR_EXPRS)
+    + ")"
+)
+_CARD_IS_AD_XP = etree.XPath(f"boolean({CARD_IS_AD})")
+
+
+# Hot-path patterns compiled once at import (these run per card / per detail page;
+# going through re's internal cache would redo the lookup on every call)
+_NON_DIGIT_RE = re.compile(r"[^\d]")
+# "5 habitaciones", "2 hab.", "3 dormitorios", "4 beds"
+_ROOMS_RE = re.compile(r"(\d+)\s*(?:hab\.?|habitacion(?:es)?|dormitorio(?:s)?|bed(?:s)?|room(?:s)?)", re.I)
+# "311 m²", "69 m² construidos", "111 m² construidos, 84 m² útiles" -> take first number
+_SQ_METERS_RE = re.compile(r"(\d+)\s*m²?", re.I)
+# "Actualizado el 12 de mayo" -> "12 de mayo"
+_UPDATED_DATE_RE = re.compile(r"^.*?(\d.*)$")
+# Bare JS object keys -> quoted JSON keys (for the embedded image gallery array)
+_JS_KEY_RE = re.compile(r"(\w+):")
+# "… : 1.234 viviendas" in the h1 (selector string lives in selectors.py)
+_TOTAL_RE = re.compile(TOTAL_REGEX)
+# Embedded gallery arrays (selector strings come from selectors.py; compiled here)
+_IMAGES_RES = tuple(re.compile(p, re.DOTALL) for p in (DETAIL_IMAGES_REGEX, DETAIL_IMAGES_REGEX_ALT))
+
+# Incremental decoder for JSON embedded mid-document: raw_decode parses one balanced
+# value starting at an offset, so the array doesn't need to be regex-delimited first
+_JSON_DECODER = json.JSONDecoder()
+
+_json_loads = json.loads if orjson is None else orjson.loads
+
+# Feature-section selectors, precompiled once: the header variants are tried in
+# priority order and the per-header label/items expressions run for every header,
+# so none of them should pay a cache lookup or a css/xpath dispatch per call
+_FEATURE_HEADER_XPS = (
+    _css(DETAIL_FEATURE_HEADERS),
+    _xp(DETAIL_FEATURE_HEADERS_ALT),
+    _css(DETAIL_FEATURE_HEADERS_ALT2),
+)
+_FEATURE_LABEL_XP = etree.XPath("./text()")
+_FEATURE_ITEMS_XP = etree.XPath(DETAIL_FEATURE_ITEMS)
+_FEATURE_ITEMS_ALT_XP = etree.XPath(DETAIL_FEATURE_ITEMS_ALT)
+
+# Detail description selectors, in priority order: first one that matches wins
+_DESCRIPTION_SELECTORS = (
+    DETAIL_DESCRIPTION,
+    DETAIL_DESCRIPTION_FALLBACK,
+    DETAIL_DESCRIPTION_ALT,
+    DETAIL_DESCRIPTION_ALT2,
+    DETAIL_DESCRIPTION_ALT3,
+    DETAIL_DESCRIPTION_ALT4,
+)
+
+
+# Characters that actually appear around Idealista prices (thousand separators,
+# currency signs, regular/narrow no-break spaces); deleted in one C-level translate
+_PRICE_DELETE_TABLE = str.maketrans("", "", ".,€$ \xa0\u202f")
+
+
 def _normalize_price(price_text: str | None) -> int | None:
     if not price_text:
         return None
-    digits = re.sub(r"[^\d]", "", price_text.strip())
+    digits = price_text.strip().translate(_PRICE_DELETE_TABLE)
+    if digits and not digits.isdigit():  # something unexpected: full regex strip
+        digits = _NON_DIGIT_RE.sub("", digits)
     return int(digits) if digits else None
 
 
 def _parse_rooms(s: str) -> int | None:
     if not s:
         return None
-    s = s.strip()
-    # "5 habitaciones", "2 hab.", "3 dormitorios", "4 beds"
-    m = re.search(r"(\d+)\s*(?:hab\.?|habitacion(?:es)?|dormitorio(?:s)?|bed(?:s)?|room(?:s)?)", s, re.I)
+    m = _ROOMS_RE.search(s.strip())
     return int(m.group(1)) if m else None
 
 
 def _parse_sq_meters(s: str) -> int | None:
     if not s:
         return None
-    s = s.strip()
-    # "311 m²", "69 m² construidos", "111 m² construidos, 84 m² útiles" -> take first number
-    m = re.search(r"(\d+)\s*m²?", s, re.I)
+    m = _SQ_METERS_RE.search(s.strip())
     return int(m.group(1)) if m else None
 
 
 def _extract_details_rooms_m2(detail_texts: list[str]) -> tuple[int | None, int | None]:
     rooms, sq_m = None, None
     for s in detail_texts:
+        if rooms is not None and sq_m is not None:
+            break
         if not s:
             continue
-        if rooms is None:
+        # Cheap substring gates before the regexes: a rooms match always contains one
+        # of these unit words and an area match always contains an 'm', so strings
+        # that can't match never reach the regex engine
+        sl = s.lower()
+        if rooms is None and ("hab" in sl or "bed" in sl or "dorm" in sl or "room" in sl):
             rooms = _parse_rooms(s)
-        if sq_m is None:
+        if sq_m is None and "m" in sl:
             sq_m = _parse_sq_meters(s)
     return rooms, sq_m
 
 
 def _location_from_title(title: str) -> str:
     """Extract location from card title, e.g. 'Piso en San Vicente, Sevilla' -> 'San Vicente, Sevilla'."""
-    if not title or not title.strip():
+    if not title:
         return ""
     t = title.strip()
-    # "Piso en X, Sevilla" or "Casa en Arenal - Museo - Tetuán, Sevilla" -> part after " en "
-    if " en " in t:
-        after_en = t.split(" en ", 1)[-1].strip()
-        if after_en:
-            return after_en
-    # "X - Centro, Sevilla" -> part after last " - " often is location
-    if " - " in t:
-        return t.split(" - ", 1)[-1].strip()
+    if len(t) < 4:  # too short to hold a separator plus a location
+        return ""
+    # "Piso en X, Sevilla" or "Casa en Arenal - Museo - Tetuán, Sevilla" -> part after " en ".
+    # partition scans once and returns the pieces directly, vs an 'in' scan + a
+    # second scan in split + a throwaway list
+    _, sep, tail = t.partition(" en ")
+    if sep:
+        tail = tail.strip()
+        if tail:
+            return tail
+    # "X - Centro, Sevilla" -> part after " - " often is location
+    _, sep, tail = t.partition(" - ")
+    if sep:
+        return tail.strip()
     return ""
 
 
+# Match "adDescription":"...", "description":"..." or similar (handle escaped quotes).
+# Each pattern is paired with its literal key so a C-level substring scan can skip the
+# regex engine entirely when the key isn't in the document — the common case. The gated
+# loop (rather than one big alternation) keeps pattern priority: adDescription wins over
+# a generic "description" key even when the latter appears earlier in the HTML.
+_SCRIPT_DESCRIPTION_PATTERNS = tuple(
+    (needle, re.compile(p, re.DOTALL))
+    for needle, p in (
+        ('"adDescription"', r'"adDescription"\s*:\s*"((?:[^"\\]|\\.)*)"'),
+        ('"description"', r'"description"\s*:\s*"((?:[^"\\]|\\.)*)"'),
+        ("'adDescription'", r"'adDescription'\s*:\s*'((?:[^'\\]|\\.)*)'"),
+    )
+)
+
+_SCRIPT_UPDATED_PATTERNS = tuple(
+    (needle, re.compile(p))
+    for needle, p in (
+        ('"lastUpdate"', r'"lastUpdate"\s*:\s*"([^"]+)"'),
+        ('"updatedDate"', r'"updatedDate"\s*:\s*"([^"]+)"'),
+        ('"dateUpdated"', r'"dateUpdated"\s*:\s*"([^"]+)"'),
+        ('"actualizado"', r'"actualizado"\s*:\s*"([^"]+)"'),
+    )
+)
+
+
 def _extract_description_from_script(html: str) -> str:
     """Try to extract property description from JSON inside script tags (Idealista sometimes embeds data)."""
     if not html:
         return ""
-    # Match "adDescription":"...", "description":"..." or similar (handle escaped quotes)
-    for pattern in (
-        r'"adDescription"\s*:\s*"((?:[^"\\]|\\.)*)"',
-        r'"description"\s*:\s*"((?:[^"\\]|\\.)*)"',
-        r"'adDescription'\s*:\s*'((?:[^'\\]|\\.)*)'",
-    ):
-        match = re.search(pattern, html, re.DOTALL)
+    for needle, pattern in _SCRIPT_DESCRIPTION_PATTERNS:
+        if needle not in html:
+            continue
+        match = pattern.search(html)
         if match:
             raw = match.group(1)
             try:
@@ -139,19 +307,16 @@ def _extract_updated_from_script(html: str) -> str:
     """Try to extract last-updated date from JSON in script tags."""
     if not html:
         return ""
-    for pattern in (
-        r'"lastUpdate"\s*:\s*"([^"]+)"',
-        r'"updatedDate"\s*:\s*"([^"]+)"',
-        r'"dateUpdated"\s*:\s*"([^"]+)"',
-        r'"actualizado"\s*:\s*"([^"]+)"',
-    ):
-        match = re.search(pattern, html)
+    for needle, pattern in _SCRIPT_UPDATED_PATTERNS:
+        if needle not in html:
+            continue
+        match = pattern.search(html)
         if match:
             return match.group(1).strip()
     return ""
 
 
-@dataclass
+@dataclass(slots=True)
 class ListingCard:
     """One listing from search results."""
     listing_type: str = "venta"
@@ -167,24 +332,28 @@ class ListingCard:
     seller: str | None = None
     seller_url: str | None = None
 
+    def fill_dict(self, out: dict[str, Any]) -> None:
+        """Write this card's fields into out (lets callers build merged dicts in place)."""
+        out["listing_type"] = self.listing_type
+        out["title"] = self.title
+        out["link"] = self.link
+        out["price"] = self.price
+        out["currency"] = self.currency
+        out["rooms"] = self.rooms
+        out["sq_meters"] = self.sq_meters
+        out["location"] = self.location
+        out["description"] = self.description
+        out["tags"] = self.tags
+        out["seller"] = self.seller
+        out["seller_url"] = self.seller_url
+
     def to_dict(self) -> dict[str, Any]:
-        return {
-            "listing_type": self.listing_type,
-            "title": self.title,
-            "link": self.link,
-            "price": self.price,
-            "currency": self.currency,
-            "rooms": self.rooms,
-            "sq_meters": self.sq_meters,
-            "location": self.location,
-            "description": self.description,
-            "tags": self.tags,
-            "seller": self.seller,
-            "seller_url": self.seller_url,
-        }
-
-
-@dataclass
+        out: dict[str, Any] = {}
+        self.fill_dict(out)
+        return out
+
+
+@dataclass(slots=True)
 class DetailListing:
     """Full listing from detail page."""
     url: str = ""
@@ -197,114 +366,113 @@ class DetailListing:
     features: dict[str, list[str]] = field(default_factory=dict)
     images: list[str] = field(default_factory=list)
 
+    def fill_dict(self, out: dict[str, Any]) -> None:
+        """Write this listing's fields into out (lets callers build merged dicts in place)."""
+        out["url"] = self.url
+        out["title"] = self.title
+        out["location"] = self.location
+        out["price"] = self.price
+        out["currency"] = self.currency
+        out["description"] = self.description
+        out["updated"] = self.updated
+        out["features"] = self.features
+        out["images"] = self.images
+
     def to_dict(self) -> dict[str, Any]:
-        return {
-            "url": self.url,
-            "title": self.title,
-            "location": self.location,
-            "price": self.price,
-            "currency": self.currency,
-            "description": self.description,
-            "updated": self.updated,
-            "features": self.features,
-            "images": self.images,
-        }
+        out: dict[str, Any] = {}
+        self.fill_dict(out)
+        return out
+
+
+def _card_from_box(box: Any, base: str) -> ListingCard | None:
+    """Build a ListingCard from one card element, or None when it has no listing link."""
+    fields = _CARD_SCALARS_XP(box).split(_CARD_FIELD_SEP)
+    if len(fields) != len(_CARD_SCALAR_EXPRS):
+        # The sentinel is a printable glyph, so user-authored text (titles, ad
+        # descriptions) can contain it; re-walk per field rather than mis-assign
+        # columns or blow up the whole page on the unpack.
+        fields = [_xp(f"string({expr})")(box) for expr in _CARD_SCALAR_EXPRS]
+    (title, href, href_fb, price_text, currency, description,
+     seller, seller_href) = fields
+    href = (href or href_fb).strip()
+    if not href:
+        return None
+    title = title.strip()
+    link = href if href.startswith("http") else (base + href)
+    price = _normalize_price(price_text.strip())
+    detail_texts = [t.strip() for t in _xp(CARD_DETAILS)(box) if t]
+    if not detail_texts:
+        detail_texts = [t.strip() for t in _xp(CARD_DETAILS_ALT)(box) if t]
+    rooms, sq_m = _extract_details_rooms_m2(detail_texts)
+    tags = [t.strip() for t in _xp(CARD_TAGS)(box) if t]
+    seller_href = seller_href.strip()
+    seller_url = (base + seller_href) if seller_href and not seller_href.startswith("http") else (seller_href or None)
+    return ListingCard(
+        title=title,
+        link=link,
+        price=price,
+        currency=currency.strip() or "€",
+        rooms=rooms,
+        sq_meters=sq_m,
+        location=_location_from_title(title),
+        description=description.replace("\n", " ").strip(),
+        tags=tags,
+        seller=seller.strip() or None,
+        seller_url=seller_url,
+    )
 
 
 def parse_search_page(
     html: str,
     base_url: str = "https://www.idealista.com",
+    root: Any = None,
 ) -> tuple[int, list[ListingCard]]:
     """
     Parse a search results page. Returns (total_count, list of listing cards).
     Skips ad cards (adv_txt). Link hrefs are normalized with base_url.
+    Pass root (from _parse_html) to reuse an already-built tree.
     """
-    sel = Selector(text=html)
+    if root is None:
+        root = _parse_html(html)
+    base = base_url.rstrip("/")
     total_count = 0
-    raw = sel.css(H1_TOTAL).re(TOTAL_REGEX)
-    if raw:
-        total_count = int(re.sub(r"[^\d]", "", raw[0]) or "0")
+    h1 = _css(H1_TOTAL)(root)
+    if h1:
+        m = _TOTAL_RE.search(h1[0].text_content())
+        if m:
+            # The captured group only holds digits and separators, so a C-level
+            # filter pass beats a second regex substitution
+            digits = "".join(filter(str.isdigit, m.group(1)))
+            if digits:
+                total_count = int(digits)
 
     cards: list[ListingCard] = []
-    for box in sel.xpath(CARDS):
-        if box.xpath(CARD_IS_AD).get():
+    for box in _xp(CARDS)(root):
+        if _CARD_IS_AD_XP(box):
             continue
-        title = (box.xpath(CARD_TITLE).get() or "").strip()
-        href = (box.xpath(CARD_LINK).get() or box.xpath(CARD_LINK_FALLBACK).get() or "").strip()
-        if not href:
-            continue
-        link = href if href.startswith("http") else (base_url.rstrip("/") + href)
-        price_text = (box.xpath(CARD_PRICE).get() or "").strip()
-        price = _normalize_price(price_text)
-        currency = (box.xpath(CARD_CURRENCY).get() or "€").strip()
-        detail_texts = [t.strip() for t in box.xpath(CARD_DETAILS).getall() if t]
-        if not detail_texts:
-            detail_texts = [t.strip() for t in box.xpath(CARD_DETAILS_ALT).getall() if t]
-        rooms, sq_m = _extract_details_rooms_m2(detail_texts)
-        location = _location_from_title(title)
-        desc_node = box.xpath(CARD_DESCRIPTION).get()
-        description = (desc_node or "").replace("\n", " ").strip()
-        tags = [t.strip() for t in box.xpath(CARD_TAGS).getall() if t]
-        seller = (box.xpath(CARD_SELLER_TITLE).get() or "").strip() or None
-        seller_href = (box.xpath(CARD_SELLER_HREF).get() or "").strip()
-        seller_url = (base_url.rstrip("/") + seller_href) if seller_href and not seller_href.startswith("http") else (seller_href or None)
-
-        cards.append(
-            ListingCard(
-                title=title,
-                link=link,
-                price=price,
-                currency=currency,
-                rooms=rooms,
-                sq_meters=sq_m,
-                location=location,
-                description=description,
-                tags=tags,
-                seller=seller,
-                seller_url=seller_url,
-            )
-        )
+        card = _card_from_box(box, base)
+        if card is not None:
+            cards.append(card)
 
     # Fallback if main selector returns 0 (site structure may have changed)
     if not cards:
-        for box in sel.xpath(CARDS_FALLBACK_ARTICLE):
-            if box.xpath(CARD_IS_AD).get():
-                continue
-            href = (box.xpath(CARD_LINK).get() or box.xpath(CARD_LINK_FALLBACK).get() or "").strip()
-            if not href:
+        for box in _xp(CARDS_FALLBACK_ARTICLE)(root):
+            if _CARD_IS_AD_XP(box):
                 continue
-            link = href if href.startswith("http") else (base_url.rstrip("/") + href)
-            title = (box.xpath(CARD_TITLE).get() or "").strip()
-            price_text = (box.xpath(CARD_PRICE).get() or "").strip()
-            price = _normalize_price(price_text)
-            detail_texts = [t.strip() for t in box.xpath(CARD_DETAILS).getall() if t]
-            if not detail_texts:
-                detail_texts = [t.strip() for t in box.xpath(CARD_DETAILS_ALT).getall() if t]
-            rooms, sq_m = _extract_details_rooms_m2(detail_texts)
-            location = _location_from_title(title)
-            cards.append(
-                ListingCard(
-                    title=title,
-                    link=link,
-                    price=price,
-                    currency=(box.xpath(CARD_CURRENCY).get() or "€").strip(),
-                    rooms=rooms,
-                    sq_meters=sq_m,
-                    location=location,
-                    description=(box.xpath(CARD_DESCRIPTION).get() or "").replace("\n", " ").strip(),
-                )
-            )
+            card = _card_from_box(box, base)
+            if card is not None:
+                cards.append(card)
     if not cards:
         seen_links: set[str] = set()
-        for link_el in sel.xpath(CARDS_FALLBACK_LINKS):
-            href = (link_el.xpath("@href").get() or "").strip()
+        for link_el in _xp(CARDS_FALLBACK_LINKS)(root):
+            href = _first(_xp("@href")(link_el)).strip()
             if not href or "/inmueble/" not in href:
                 continue
-            link = href if href.startswith("http") else (base_url.rstrip("/") + href)
+            link = href if href.startswith("http") else (base + href)
             if link in seen_links:
                 continue
             seen_links.add(link)
-            title = (link_el.xpath("@title").get() or link_el.xpath("text()").get() or "").strip()
+            title = (_first(_xp("@title")(link_el)) or _first(_xp("text()")(link_el))).strip()
             cards.append(
                 ListingCard(
                     link=link,
@@ -316,58 +484,116 @@ def parse_search_page(
     return total_count, cards
 
 
-def looks_like_listing_page(html: str, base_url: str = "https://www.idealista.com") -> bool:
+# Listing-page sniff needles, matched in one linear pass with an Aho-Corasick automaton
+# when ahocorasick_rs is installed (same optional dependency the fetcher uses for its
+# block indicators); otherwise via per-needle substring scans. _sniff returns a bitmask
+# of which needles appeared so callers check bits instead of rescanning the body.
+# The mask is only trusted to fast-ACCEPT: missing needles never reject a page, since a
+# saved or restructured page can parse to real cards without any of these literals.
+_SNIFF_NEEDLES = ("/inmueble/", "idealista.com", "items-list", "item-info-container")
+(_SNIFF_INMUEBLE, _SNIFF_IDEALISTA_COM,
+ _SNIFF_ITEMS_LIST, _SNIFF_ITEM_INFO) = (1 << i for i in range(4))
+_SNIFF_ALL = (1 << len(_SNIFF_NEEDLES)) - 1
+
+try:
+    import ahocorasick_rs as _ahocorasick
+    _SNIFF_AC = _ahocorasick.AhoCorasick(list(_SNIFF_NEEDLES), ascii_case_insensitive=True)
+except ImportError:
+    _SNIFF_AC = None
+
+
+def _sniff(html: str) -> int:
+    """Bitmask of the sniff needles present in html."""
+    mask = 0
+    if _SNIFF_AC is not None:
+        for idx, _start, _end in _SNIFF_AC.find_matches_as_indexes(html):
+            mask |= 1 << idx
+            if mask == _SNIFF_ALL:
+                break
+        return mask
+    for bit, needle in enumerate(_SNIFF_NEEDLES):
+        if needle in html:
+            mask |= 1 << bit
+    return mask
+
+
+def looks_like_listing_page(html: str, base_url: str = "https://www.idealista.com", root: Any = None) -> bool:
     """
     True if the HTML looks like a valid search listing page (has total count, listing cards,
     or /inmueble/ links). Avoids false-positive block when the page contains words like 'challenge'.
+    Pass root to reuse a tree the caller already parsed (avoids parsing the same HTML twice).
     """
-    try:
-        total_count, cards = parse_search_page(html, base_url=base_url)
-        if total_count > 0 or len(cards) > 0:
-            return True
-    except Exception:
-        pass
-    # Fallback even when parse fails or returns empty: page has listing links or clear Idealista content
-    if "/inmueble/" in html and "idealista.com" in html:
+    if not html:
+        return False
+    # Cheap sniff first: pages with the obvious listing markers are accepted without
+    # building a tree. Fast-accept only — this verdict rescues pages from a block
+    # classification, so anything the sniff can't confirm gets the real parse.
+    mask = _sniff(html)
+    if mask & _SNIFF_INMUEBLE and mask & _SNIFF_IDEALISTA_COM:
         return True
-    if len(html) > 5000 and "idealista" in html.lower() and ("items-list" in html or "item-info-container" in html):
+    if len(html) > 5000 and mask & (_SNIFF_ITEMS_LIST | _SNIFF_ITEM_INFO):
         return True
-    return False
+    # No obvious markers: do the real parse
+    try:
+        total_count, cards = parse_search_page(html, base_url=base_url, root=root)
+        return total_count > 0 or len(cards) > 0
+    except Exception:
+        return False
 
 
-def parse_detail_page(html: str, url: str = "") -> DetailListing:
+@functools.lru_cache(maxsize=64)
+def _scheme_netloc(origin: str) -> str:
+    """'scheme://netloc' for an absolute URL; cached (Idealista has a handful of hosts)."""
+    parsed = urlparse(origin)
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+def _detail_base(url: str) -> str:
+    # Slice the origin before caching: detail URLs are unique, so keying the cache
+    # on the full URL would never hit. Everything before the first path slash is
+    # shared by thousands of pages per host.
+    slash = url.find("/", url.find("://") + 3)
+    return _scheme_netloc(url if slash < 0 else url[:slash])
+
+
+def parse_detail_page(html: str, url: str = "", root: Any = None) -> DetailListing:
     """
     Parse a property detail page. Returns DetailListing.
     Uses .main-info__title, .info-features, .details-property, first picture; images from JS when present.
+    Pass root (from _parse_html) to reuse an already-built tree.
     """
-    sel = Selector(text=html)
-    css = lambda x: (sel.css(x).get() or "").strip()
-    css_all = lambda x: [t.strip() for t in sel.css(x).getall() if t]
+    if root is None:
+        root = _parse_html(html)
+    def css(x: str) -> str:
+        return _first(_css(x)(root)).strip()
+
+    def css_all(x: str) -> list[str]:
+        return [t.strip() for t in _css(x)(root) if t]
 
     title = css(DETAIL_TITLE) or css(DETAIL_TITLE_FALLBACK)
     location = css(DETAIL_LOCATION) or css(DETAIL_LOCATION_FALLBACK)
-    price_node_text = (sel.css(DETAIL_PRICE_SPAN).get() or sel.css(DETAIL_PRICE_NODE).xpath("text()").get() or "").strip()
+    price_node_text = (_first(_css(DETAIL_PRICE_SPAN)(root)) or _first(_css(DETAIL_PRICE_NODE + "::text")(root))).strip()
     price = _normalize_price(price_node_text)
-    currency = (sel.css(DETAIL_PRICE_NODE).xpath("span/text()").get() or "€").strip()
-    description = "\n".join(
-        css_all(DETAIL_DESCRIPTION)
-        or css_all(DETAIL_DESCRIPTION_FALLBACK)
-        or css_all(DETAIL_DESCRIPTION_ALT)
-        or css_all(DETAIL_DESCRIPTION_ALT2)
-        or css_all(DETAIL_DESCRIPTION_ALT3)
-        or css_all(DETAIL_DESCRIPTION_ALT4)
-    ).strip()
+    currency = (_first(_css(DETAIL_PRICE_NODE + " > span::text")(root)) or "€").strip()
+    description = ""
+    for desc_sel in _DESCRIPTION_SELECTORS:
+        parts = css_all(desc_sel)
+        if parts:
+            description = "\n".join(parts).strip()
+            break
     if not description:
         description = _extract_description_from_script(html)
 
     updated_raw = (
-        sel.xpath(DETAIL_UPDATED).get()
-        or sel.xpath(DETAIL_UPDATED_ALT).get()
+        _first(_xp(DETAIL_UPDATED)(root))
+        or _first(_xp(DETAIL_UPDATED_ALT)(root))
         or ""
     )
-    if not updated_raw:
-        for node in sel.xpath(DETAIL_UPDATED_ALT2):
-            t = (node.get() or "").strip()
+    # The any-node fallback is the priciest selector on the page; skip it entirely
+    # unless the keyword even appears in the raw HTML (C-level scan)
+    if not updated_raw and ("Actualizado" in html or "updated" in html or "Updated" in html):
+        for t in _xp(DETAIL_UPDATED_ALT2)(root):
+            t = (t or "").strip()
             if t and ("Actualizado" in t or "updated" in t.lower()):
                 updated_raw = t
                 break
@@ -376,7 +602,7 @@ def parse_detail_page(html: str, url: str = "") -> DetailListing:
         if " on " in updated_raw:
             updated = updated_raw.split(" on ")[-1].strip()
         elif "Actualizado" in updated_raw or "actualizado" in updated_raw:
-            updated = re.sub(r"^.*?(\d.*)$", r"\1", updated_raw).strip()
+            updated = _UPDATED_DATE_RE.sub(r"\1", updated_raw).strip()
         else:
             updated = updated_raw.strip()
     if not updated:
@@ -391,24 +617,15 @@ def parse_detail_page(html: str, url: str = "") -> DetailListing:
         rooms = _parse_rooms(feature_spans[1])
 
     features: dict[str, list[str]] = {}
-    header_selectors = [
-        ("css", DETAIL_FEATURE_HEADERS),
-        ("xpath", DETAIL_FEATURE_HEADERS_ALT),
-        ("css", DETAIL_FEATURE_HEADERS_ALT2),
-    ]
-    for kind, selector in header_selectors:
-        if kind == "css":
-            headers = sel.css(selector)
-        else:
-            headers = sel.xpath(selector)
-        for header in headers:
-            label = (header.xpath("text()").get() or "").strip()
+    for header_xp in _FEATURE_HEADER_XPS:
+        for header in header_xp(root):
+            label = "".join(_FEATURE_LABEL_XP(header)).strip()
             if not label:
                 continue
-            items = header.xpath(DETAIL_FEATURE_ITEMS)
-            if not items:
-                items = header.xpath(DETAIL_FEATURE_ITEMS_ALT)
-            texts = ["".join(node.xpath(".//text()").getall()).strip() for node in items]
+            items = _FEATURE_ITEMS_XP(header) or _FEATURE_ITEMS_ALT_XP(header)
+            # itertext() walks the li subtree directly; the .//text() XPath would
+            # allocate an intermediate node list per item
+            texts = ["".join(node.itertext()).strip() for node in items]
             if texts and label not in features:
                 features[label] = texts
         if features:
@@ -420,24 +637,22 @@ def parse_detail_page(html: str, url: str = "") -> DetailListing:
         ("details_property_three", DETAIL_PROPERTY_FEATURE_THREE, DETAIL_PROPERTY_FEATURE_THREE_ALT),
     ):
         for sel_desc in (selector + " ::text", selector_alt + " ::text"):
-            parts = sel.css(sel_desc).getall()
+            parts = _css(sel_desc)(root)
             combined = " ".join(t.strip() for t in parts if t and t.strip()).strip()
             if combined:
                 features[key] = [combined]
                 break
-    # Fallback: extract rooms and sq_m from any feature text (e.g. "5 habitaciones", "311 m²")
-    for _label, items in features.items():
-        for text in items:
-            if not text:
-                continue
+    # Fallback: extract rooms and sq_m from any feature text (e.g. "5 habitaciones", "311 m²"),
+    # with the same substring-gated early exit as the card loop
+    if rooms is None or sq_m is None:
+        for _label, items in features.items():
+            rooms_fb, sq_m_fb = _extract_details_rooms_m2(items)
             if rooms is None:
-                rooms = _parse_rooms(text)
+                rooms = rooms_fb
             if sq_m is None:
-                sq_m = _parse_sq_meters(text)
+                sq_m = sq_m_fb
             if rooms is not None and sq_m is not None:
                 break
-        if rooms is not None and sq_m is not None:
-            break
     if len(feature_spans) >= 3 and feature_spans[2].strip():
         features["info_feature_3"] = [feature_spans[2].strip()]
     if rooms is not None:
@@ -446,27 +661,32 @@ def parse_detail_page(html: str, url: str = "") -> DetailListing:
         features["sq_meters"] = [str(sq_m)]
 
     images: list[str] = []
-    base = "https://www.idealista.com"
-    if url and url.startswith("http"):
-        parsed = urlparse(url)
-        base = f"{parsed.scheme}://{parsed.netloc}"
+    base = _detail_base(url) if url and url.startswith("http") else "https://www.idealista.com"
     for picture_sel in (DETAIL_PICTURE, DETAIL_PICTURE_ALT, DETAIL_PICTURE_ALT2, DETAIL_PICTURE_ALT3):
-        first_img = (sel.css(picture_sel).get() or "").strip()
+        first_img = _first(_css(picture_sel)(root)).strip()
         if first_img:
             images.append(first_img if first_img.startswith("http") else (base + first_img))
             break
-    for regex in (DETAIL_IMAGES_REGEX, DETAIL_IMAGES_REGEX_ALT):
-        match = re.search(regex, html, re.DOTALL)
+    for regex in _IMAGES_RES:
+        match = regex.search(html)
         if match:
             try:
-                raw_json = match.group(1)
-                raw_json = re.sub(r"(\w+):", r'"\1":', raw_json)
-                arr = json.loads(raw_json)
+                # Parse the array in place first: raw_decode consumes one balanced JSON
+                # value from the match offset, so a ']' inside a string value can't
+                # truncate it. Only when that fails (bare JS keys) fall back to the
+                # key-quoting rewrite of the regex-delimited fragment.
+                try:
+                    arr, _ = _JSON_DECODER.raw_decode(html, match.start(1))
+                except json.JSONDecodeError:
+                    raw_json = _JS_KEY_RE.sub(r'"\1":', match.group(1))
+                    arr = _json_loads(raw_json)
+                seen_images = set(images)
                 for item in arr:
                     if isinstance(item, dict) and "imageUrl" in item:
                         path = item["imageUrl"]
                         u = path if path.startswith("http") else (base + path)
-                        if u not in images:
+                        if u not in seen_images:
+                            seen_images.add(u)
                             images.append(u)
                 if images:
                     break
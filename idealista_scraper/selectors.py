@@ -44,7 +44,9 @@ DETAIL_DESCRIPTION_ALT3 = "[class*='description'] ::text"
 DETAIL_DESCRIPTION_ALT4 = "section[class*='description'] ::text"
 DETAIL_UPDATED = "//p[@class='stats-text'][contains(.,'updated') or contains(.,'Actualizado')]/text()"
 DETAIL_UPDATED_ALT = "//p[contains(@class,'stats') and (contains(.,'updated') or contains(.,'Actualizado'))]/text()"
-DETAIL_UPDATED_ALT2 = "//*[contains(.,'Actualizado') or contains(.,'updated')]/text()"
+# Restricted to text-bearing tags: //* would evaluate contains() against every
+# element's full string value (quadratic in document size)
+DETAIL_UPDATED_ALT2 = "(//p|//span|//div|//time)[contains(.,'Actualizado') or contains(.,'updated')]/text()"
 # Main features: sq m, rooms, feature 3 (nth-child 1, 2, 3)
 DETAIL_INFO_FEATURES = ".detail-info section .info-features span::text"
 DETAIL_INFO_FEATURES_ALT = ".info-features span::text"
@@ -0,0 +1,61 @@
+"""Tests for CSV export and resume (round trip, legacy-header migration, link normalization)."""
+import csv
+
+from idealista_scraper.export import (
+    CSV_COLUMNS,
+    IncrementalCSVWriter,
+    get_resume_state_from_csv,
+    normalize_listing_link,
+)
+
+
+def test_normalize_listing_link():
+    canonical = "https://www.idealista.com/inmueble/94156485/"
+    assert normalize_listing_link(canonical) == canonical
+    assert normalize_listing_link("https://www.idealista.com/ca/inmueble/94156485/") == canonical
+    assert normalize_listing_link("https://www.idealista.com/en/inmueble/94156485/") == canonical
+    assert normalize_listing_link("https://www.idealista.com/inmueble/94156485/?shared=1") == canonical
+    # Non-listing URLs pass through untouched (just stripped)
+    assert normalize_listing_link(" https://www.idealista.com/agencias/ ") == "https://www.idealista.com/agencias/"
+    assert normalize_listing_link("") == ""
+
+
+def test_incremental_csv_writer_round_trip(tmp_path):
+    path = tmp_path / "out.csv"
+    with IncrementalCSVWriter(path) as writer:
+        writer.write({"title": "a", "link": "https://www.idealista.com/inmueble/10/", "price": 185_000, "_source_page": 2})
+        writer.write({"title": "b", "link": "https://www.idealista.com/en/inmueble/11/", "_source_page": 3})
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == CSV_COLUMNS
+    assert len(rows) == 3
+    assert all(len(r) == len(CSV_COLUMNS) for r in rows[1:])
+    links, last_page = get_resume_state_from_csv(path)
+    assert links == {
+        "https://www.idealista.com/inmueble/10/",
+        "https://www.idealista.com/inmueble/11/",  # en/ variant resumed canonically
+    }
+    assert last_page == 3
+
+
+def test_incremental_csv_writer_legacy_header(tmp_path):
+    """Appending to a pre-source_page file must not produce rows wider than its header."""
+    path = tmp_path / "legacy.csv"
+    old_columns = CSV_COLUMNS[:-1]  # written before source_page existed
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        w.writerow(old_columns)
+        w.writerow(["t1", "https://www.idealista.com/inmueble/1/"] + [""] * (len(old_columns) - 2))
+    with IncrementalCSVWriter(path) as writer:
+        writer.write({"title": "t2", "link": "https://www.idealista.com/inmueble/2/", "_source_page": 4})
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    # The file was migrated to the current schema: one header, uniform row width
+    assert rows[0] == CSV_COLUMNS
+    assert all(len(r) == len(CSV_COLUMNS) for r in rows[1:])
+    links, last_page = get_resume_state_from_csv(path)
+    assert links == {
+        "https://www.idealista.com/inmueble/1/",
+        "https://www.idealista.com/inmueble/2/",
+    }
+    assert last_page == 4
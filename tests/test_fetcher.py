@@ -1,7 +1,7 @@
-"""Tests for fetcher (block detection, no real network in tests)."""
+"""Tests for fetcher (block detection and response classification, no real network in tests)."""
 import pytest
 
-from idealista_scraper.fetcher import is_blocked_page
+from idealista_scraper.fetcher import _classify, is_blocked_page
 
 
 def test_is_blocked_page_empty():
@@ -19,3 +19,14 @@ def test_is_blocked_page_indicators():
 def test_is_not_blocked_listing():
     html = "x" * 1000 + "<h1 id='h1-container'>Venta de viviendas: 500</h1><section class='items-list'>"
     assert is_blocked_page(html) is False
+
+
+def test_classify_flags():
+    res = _classify("not found", 404)
+    assert res.status == 404
+    assert res.is_blocked is False and res.is_listing is False
+    res = _classify("x" * 1000 + "Please enable JS and cookies", 200)
+    assert res.is_blocked is True and res.is_listing is False
+    html = "x" * 1000 + "<h1 id='h1-container'>Venta de viviendas: 500</h1><section class='items-list'>"
+    res = _classify(html, 200)
+    assert res.is_blocked is False and res.is_listing is True
@@ -6,6 +6,7 @@ import pytest
 from idealista_scraper.parsers import (
     DetailListing,
     ListingCard,
+    looks_like_listing_page,
     parse_detail_page,
     parse_search_page,
 )
@@ -61,6 +62,21 @@ def test_parse_detail_page_fixture():
     assert any("foto" in i for i in detail.images)
 
 
+def test_looks_like_listing_page_fixture():
+    html = (FIXTURES_DIR / "search_page.html").read_text(encoding="utf-8")
+    assert looks_like_listing_page(html) is True
+    # The verdict must come from the cards, not from spotting the site name
+    assert looks_like_listing_page(html.replace("idealista", "example")) is True
+
+
+def test_looks_like_listing_page_negative():
+    assert looks_like_listing_page("") is False
+    assert looks_like_listing_page("x" * 6000) is False
+    # A detail page is a valid idealista page but not a search listing page
+    detail = (FIXTURES_DIR / "detail_page.html").read_text(encoding="utf-8")
+    assert looks_like_listing_page(detail) is False
+
+
 def test_parse_detail_page_schema():
     html = (FIXTURES_DIR / "detail_page.html").read_text(encoding="utf-8")
     detail = parse_detail_page(html, url="https://www.idealista.com/inmueble/1/")